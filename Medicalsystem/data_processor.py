@@ -10,6 +10,15 @@ import re
 from typing import List, Dict, Tuple, Optional
 from database_manager import DatabaseManager
 
+# Required columns for medical test data
+_REQUIRED_COLUMNS = ('patient_id', 'test_name', 'test_value')
+
+# Rows read from the CSV at a time during import
+_IMPORT_CHUNK_ROWS = 10_000
+
+class _CSVValidationError(Exception):
+    """Raised inside the import transaction to discard a file that failed validation"""
+
 class DataProcessor:
     def __init__(self, db_manager: DatabaseManager):
         """Initialize data processor with database manager"""
@@ -28,33 +37,13 @@ class DataProcessor:
             if df.empty:
                 return False, "CSV file is empty", None
             
-            # Required columns for medical test data
-            required_columns = ['patient_id', 'test_name', 'test_value']
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            missing_columns = [col for col in _REQUIRED_COLUMNS if col not in df.columns]
             
             if missing_columns:
                 return False, f"Missing required columns: {', '.join(missing_columns)}", None
             
             # Check for valid data types and formats
-            validation_errors = []
-            
-            # Validate patient IDs (should not be empty)
-            if df['patient_id'].isnull().any():
-                validation_errors.append("Patient ID cannot be empty")
-            
-            # Validate test values (should be numeric)
-            non_numeric_values = df[~pd.to_numeric(df['test_value'], errors='coerce').notnull()]
-            if not non_numeric_values.empty:
-                validation_errors.append(f"Non-numeric test values found in rows: {non_numeric_values.index.tolist()}")
-            
-            # Validate date format if date column exists
-            if 'date' in df.columns:
-                date_rows = df[df['date'].notna()]
-                if not date_rows.empty:
-                    try:
-                        pd.to_datetime(date_rows['date'], errors='raise')
-                    except:
-                        validation_errors.append("Invalid date format in date column. Use YYYY-MM-DD format")
+            validation_errors = self._row_validation_errors(df)
             
             if validation_errors:
                 return False, "; ".join(validation_errors), df
@@ -68,6 +57,30 @@ class DataProcessor:
         except Exception as e:
             return False, f"Error reading CSV file: {str(e)}", None
     
+    def _row_validation_errors(self, df: pd.DataFrame) -> List[str]:
+        """Row-level format problems in df (the required columns must be present)"""
+        validation_errors = []
+        
+        # Validate patient IDs (should not be empty)
+        if df['patient_id'].isnull().any():
+            validation_errors.append("Patient ID cannot be empty")
+        
+        # Validate test values (should be numeric)
+        non_numeric_values = df[~pd.to_numeric(df['test_value'], errors='coerce').notnull()]
+        if not non_numeric_values.empty:
+            validation_errors.append(f"Non-numeric test values found in rows: {non_numeric_values.index.tolist()}")
+        
+        # Validate date format if date column exists
+        if 'date' in df.columns:
+            date_rows = df[df['date'].notna()]
+            if not date_rows.empty:
+                try:
+                    pd.to_datetime(date_rows['date'], errors='raise')
+                except:
+                    validation_errors.append("Invalid date format in date column. Use YYYY-MM-DD format")
+        
+        return validation_errors
+    
     def preview_csv_data(self, file_path: str, num_rows: int = None) -> Tuple[bool, str, Optional[pd.DataFrame]]:
         """
         Preview CSV data - shows all rows by default for complete visibility
@@ -101,8 +114,8 @@ class DataProcessor:
         # Convert test values to numeric
         cleaned_df['test_value'] = pd.to_numeric(cleaned_df['test_value'], errors='coerce')
         
-        # Standardize date format
-        cleaned_df['test_date'] = pd.to_datetime(cleaned_df['test_date']).dt.strftime('%Y-%m-%d')
+        # Standardize date format (unparseable dates become missing)
+        cleaned_df['test_date'] = pd.to_datetime(cleaned_df['test_date'], errors='coerce').dt.strftime('%Y-%m-%d')
         
         # Clean optional columns if they exist
         if 'lab_technician' in cleaned_df.columns:
@@ -132,7 +145,7 @@ class DataProcessor:
         unique_patients = df[available_columns].drop_duplicates(subset=['patient_id'])
         
         patients_list = []
-        for _, row in unique_patients.iterrows():
+        for row in unique_patients.to_dict('records'):
             patient_info = {'patient_id': row['patient_id']}
             
             for col in optional_patient_columns:
@@ -153,6 +166,14 @@ class DataProcessor:
         
         return patients_list
     
+    @staticmethod
+    def _optional_text(df: pd.DataFrame, column: str) -> List[Optional[str]]:
+        """Values of an optional text column with '' as None (all None if the column is missing)"""
+        if column not in df.columns:
+            return [None] * len(df)
+        values = df[column].astype(object)
+        return values.where(values != '', None).tolist()
+    
     def import_csv_data(self, file_path: str, update_existing: bool = False, 
                        check_duplicates: bool = True) -> Tuple[bool, str, Dict]:
         """
@@ -165,17 +186,9 @@ class DataProcessor:
             
         Returns: (success, message, import_stats)
         """
-        # Validate CSV format
-        is_valid, validation_message, df = self.validate_csv_format(file_path)
-        if not is_valid:
-            return False, validation_message, {}
-        
-        # Clean and standardize data
-        cleaned_df = self.clean_and_standardize_data(df)
-        
         import_stats = {
-            'total_rows': len(df),
-            'processed_rows': len(cleaned_df),
+            'total_rows': 0,
+            'processed_rows': 0,
             'patients_added': 0,
             'patients_updated': 0,
             'test_results_added': 0,
@@ -185,77 +198,52 @@ class DataProcessor:
         }
         
         try:
-            # Extract and process patient information
-            patients_to_process = self.extract_patient_info_from_csv(cleaned_df)
+            # Read the file in chunks so only one chunk's rows are in memory at a time
+            reader = pd.read_csv(file_path, chunksize=_IMPORT_CHUNK_ROWS)
             
-            for patient_info in patients_to_process:
-                patient_id = patient_info['patient_id']
-                existing_patient = self.db_manager.get_patient(patient_id)
+            # One transaction for the whole file instead of a commit per row; each
+            # helper call runs in its own savepoint, so a failing row only undoes
+            # itself, while a validation error in any chunk discards the whole file
+            with self.db_manager.transaction():
+                type_cache = {test_type[1].lower(): test_type[0]
+                              for test_type in self.db_manager.get_test_types()}
+                seen_patients = set()
+                validation_errors = []
+                deferred_indexes = []
                 
-                if existing_patient is None:
-                    # Add new patient
-                    success = self.db_manager.add_patient(**patient_info)
-                    if success:
-                        import_stats['patients_added'] += 1
-                    else:
-                        import_stats['errors'].append(f"Failed to add patient {patient_id}")
-                elif update_existing:
-                    # Update existing patient with new information
-                    update_data = {k: v for k, v in patient_info.items() if k != 'patient_id'}
-                    if update_data:
-                        success = self.db_manager.update_patient(patient_id, **update_data)
-                        if success:
-                            import_stats['patients_updated'] += 1
-            
-            # Process test results
-            for _, row in cleaned_df.iterrows():
-                # Auto-create test type with NO preset ranges (user must configure)
-                test_type = self.db_manager.get_test_type_by_name(row['test_name'])
-                if test_type is None:
-                    # Create test type with NO ranges - user must configure manually
-                    success = self.db_manager.add_test_type(
-                        test_name=row['test_name'],
-                        unit=row.get('unit', ''),
-                        normal_min=None,  # No preset ranges
-                        normal_max=None,  # No preset ranges
-                        description=f"Imported: {row['test_name']}"
-                    )
-                    if success:
-                        import_stats['test_types_added'] += 1
-                        test_type = self.db_manager.get_test_type_by_name(row['test_name'])
-                        print(f"Created test type: {row['test_name']}")
-                    else:
-                        import_stats['errors'].append(f"Failed to create test type: {row['test_name']}")
+                for chunk in reader:
+                    if chunk.empty:
                         continue
+                    
+                    if import_stats['total_rows'] == 0:
+                        missing_columns = [col for col in _REQUIRED_COLUMNS if col not in chunk.columns]
+                        if missing_columns:
+                            raise _CSVValidationError(f"Missing required columns: {', '.join(missing_columns)}")
+                    
+                    import_stats['total_rows'] += len(chunk)
+                    
+                    # After the first invalid chunk, keep reading only to report every problem
+                    validation_errors.extend(self._row_validation_errors(chunk))
+                    if validation_errors:
+                        continue
+                    
+                    # A full first chunk means a large file: rebuild read-only
+                    # indexes once at the end instead of updating them per row
+                    if import_stats['processed_rows'] == 0 and len(chunk) == _IMPORT_CHUNK_ROWS:
+                        deferred_indexes = self.db_manager.drop_nonessential_indexes()
+                    
+                    # Clean and standardize data
+                    cleaned_df = self.clean_and_standardize_data(chunk)
+                    import_stats['processed_rows'] += len(cleaned_df)
+                    self._import_chunk(cleaned_df, update_existing, check_duplicates,
+                                       import_stats, type_cache, seen_patients)
                 
-                # Add test result
-                lab_technician = row.get('lab_technician', '')
-                notes = row.get('notes', '')
-                
-                success = self.db_manager.add_test_result(
-                    patient_id=row['patient_id'],
-                    test_type_id=test_type[0],  # test_type_id is the first column
-                    test_value=float(row['test_value']),
-                    test_date=row['test_date'],
-                    lab_technician=lab_technician if lab_technician != '' else None,
-                    notes=notes if notes != '' else None,
-                    check_duplicates=check_duplicates
-                )
+                if import_stats['total_rows'] == 0:
+                    raise _CSVValidationError("CSV file is empty")
+                if validation_errors:
+                    raise _CSVValidationError("; ".join(dict.fromkeys(validation_errors)))
                 
-                if success:
-                    import_stats['test_results_added'] += 1
-                else:
-                    # Could be either duplicate or error - check if it's a duplicate
-                    is_duplicate = self.db_manager.check_duplicate_test_result(
-                        patient_id=row['patient_id'],
-                        test_type_id=test_type[0],
-                        test_value=float(row['test_value']),
-                        test_date=row['test_date']
-                    )
-                    if is_duplicate:
-                        import_stats['duplicates_skipped'] += 1
-                    else:
-                        import_stats['errors'].append(f"Failed to add test result for patient {row['patient_id']}")
+                self.db_manager.restore_indexes(deferred_indexes)
             
             # Generate success message
             success_message = f"""Import completed successfully!
@@ -273,9 +261,98 @@ class DataProcessor:
             
             return True, success_message, import_stats
             
+        except _CSVValidationError as e:
+            return False, str(e), {}
+        except FileNotFoundError:
+            return False, "File not found", {}
+        except pd.errors.EmptyDataError:
+            return False, "CSV file is empty or corrupted", {}
         except Exception as e:
             return False, f"Import failed: {str(e)}", import_stats
     
+    def _import_chunk(self, cleaned_df: pd.DataFrame, update_existing: bool, check_duplicates: bool,
+                      import_stats: Dict, type_cache: Dict[str, int], seen_patients: set):
+        """
+        Write one cleaned chunk of the CSV, adding its counts to import_stats
+        
+        type_cache maps lowercased test names to ids and seen_patients holds the
+        patient IDs handled by earlier chunks; both are updated in place.
+        """
+        # Extract and process patient information
+        patients_to_process = self.extract_patient_info_from_csv(cleaned_df)
+        
+        for patient_info in patients_to_process:
+            patient_id = patient_info['patient_id']
+            if patient_id in seen_patients:
+                continue
+            seen_patients.add(patient_id)
+            
+            # Insert skips existing IDs in SQLite, so no lookup is needed first
+            if self.db_manager.add_patient(**patient_info):
+                import_stats['patients_added'] += 1
+            elif update_existing:
+                # Update existing patient with new information
+                update_data = {k: v for k, v in patient_info.items() if k != 'patient_id'}
+                if update_data:
+                    success = self.db_manager.update_patient(patient_id, **update_data)
+                    if success:
+                        import_stats['patients_updated'] += 1
+        
+        # Pass 1: resolve each distinct test type once against the name index of
+        # the existing types (case-insensitive, as the CSV names are title-cased),
+        # auto-creating missing ones with NO preset ranges (user must configure)
+        test_type_ids = {}
+        first_rows = cleaned_df.drop_duplicates(subset=['test_name'])
+        units = first_rows['unit'].tolist() if 'unit' in first_rows.columns else [''] * len(first_rows)
+        for test_name, unit in zip(first_rows['test_name'].tolist(), units):
+            name_key = test_name.lower() if isinstance(test_name, str) else test_name
+            test_type_id = type_cache.get(name_key)
+            if test_type_id is None:
+                # Create test type with NO ranges - user must configure manually
+                test_type_id = self.db_manager.add_test_type(
+                    test_name=test_name,
+                    unit=unit,
+                    normal_min=None,  # No preset ranges
+                    normal_max=None,  # No preset ranges
+                    description=f"Imported: {test_name}"
+                )
+                if test_type_id is not None:
+                    import_stats['test_types_added'] += 1
+                    type_cache[name_key] = test_type_id
+                    print(f"Created test type: {test_name}")
+            if test_type_id is not None:
+                test_type_ids[test_name] = test_type_id
+        
+        # Pass 2: build the result rows column-wise and insert them with one
+        # executemany; rows whose test type could not be created are reported
+        type_ids = cleaned_df['test_name'].map(test_type_ids)
+        resolved = type_ids.notna()
+        import_stats['errors'].extend(f"Failed to create test type: {test_name}"
+                                      for test_name in cleaned_df.loc[~resolved, 'test_name'])
+        
+        # A row without a test date would fail NOT NULL and abort the whole
+        # batch, so such rows are left out and reported one by one
+        dated = cleaned_df['test_date'].notna()
+        import_stats['errors'].extend(f"Row {row}: missing or invalid test date"
+                                      for row in cleaned_df.index[resolved & ~dated])
+        
+        valid = resolved & dated
+        rows = cleaned_df[valid]
+        test_rows = list(zip(rows['patient_id'].tolist(),
+                             type_ids[valid].astype(int).tolist(),
+                             rows['test_value'].astype(float).tolist(),
+                             rows['test_date'].tolist(),
+                             self._optional_text(rows, 'lab_technician'),
+                             self._optional_text(rows, 'notes')))
+        
+        # Rows the duplicate check rejects are the ones not inserted
+        inserted = self.db_manager.bulk_import_rows([], test_rows, check_duplicates=check_duplicates)
+        if inserted is None:
+            # Fails the import and rolls back the chunks already written
+            raise RuntimeError(f"Failed to add {len(test_rows)} test results")
+        import_stats['test_results_added'] += inserted
+        import_stats['duplicates_skipped'] += len(test_rows) - inserted
+    
     def generate_csv_template(self, file_path: str) -> bool:
         """Generate a CSV template file for patient and test data import"""
         try:
@@ -302,21 +379,32 @@ class DataProcessor:
         """Validate test values against normal ranges and return warnings"""
         warnings = []
         
-        for _, row in df.iterrows():
-            test_type = self.db_manager.get_test_type_by_name(row['test_name'])
+        # Normal range per distinct test name, then one vectorized comparison
+        limits = {}
+        for test_name in df['test_name'].unique():
+            test_type = self.db_manager.get_test_type_by_name(test_name)
             if test_type and test_type[2] is not None and test_type[3] is not None:
-                normal_min = test_type[2]
-                normal_max = test_type[3]
-                test_value = float(row['test_value'])
-                
-                if test_value < normal_min or test_value > normal_max:
-                    warnings.append({
-                        'patient_id': row['patient_id'],
-                        'test_name': row['test_name'],
-                        'test_value': test_value,
-                        'normal_range': f"{normal_min}-{normal_max}",
-                        'status': 'HIGH' if test_value > normal_max else 'LOW'
-                    })
+                limits[test_name] = (test_type[2], test_type[3])
+        
+        if not limits:
+            return warnings
+        
+        limits_df = pd.DataFrame.from_dict(limits, orient='index', columns=['normal_min', 'normal_max'])
+        checked = df.join(limits_df, on='test_name', how='inner')
+        test_values = checked['test_value'].astype(float)
+        out_of_range = checked[(test_values < checked['normal_min']) | (test_values > checked['normal_max'])]
+        
+        for patient_id, test_name, test_value, normal_min, normal_max in zip(
+                out_of_range['patient_id'].tolist(), out_of_range['test_name'].tolist(),
+                out_of_range['test_value'].astype(float).tolist(),
+                out_of_range['normal_min'].tolist(), out_of_range['normal_max'].tolist()):
+            warnings.append({
+                'patient_id': patient_id,
+                'test_name': test_name,
+                'test_value': test_value,
+                'normal_range': f"{normal_min}-{normal_max}",
+                'status': 'HIGH' if test_value > normal_max else 'LOW'
+            })
         
         return warnings
     
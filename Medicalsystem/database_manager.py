@@ -5,18 +5,354 @@ Handles all database operations including patient records and test results.
 
 import sqlite3
 import os
-from datetime import datetime
-from typing import List, Tuple, Optional
+import threading
+import re
+import bisect
+import json
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
+from datetime import date, datetime
+from types import MappingProxyType
+from typing import Dict, List, Tuple, Optional
+
+# Try to import orjson for faster range import/export
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _json_dumps(obj) -> str:
+    """Serialize to 2-space indented JSON, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode('utf-8')
+    return json.dumps(obj, indent=2, default=str)
+
+
+def _json_load(file_path: str):
+    """Parse a JSON file, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# Fixed results of get_age_gender_adjusted_range when no range applies
+_NO_RANGE_FOUND = MappingProxyType({
+    'normal_min': None,
+    'normal_max': None,
+    'critical_low': None,
+    'critical_high': None,
+    'source': 'No range found',
+    'age_adjusted': False,
+    'gender_adjusted': False
+})
+_NO_RANGE_CONFIGURED = MappingProxyType(dict(
+    _NO_RANGE_FOUND, source='No range configured - please add via Test Configuration'))
+
+# Columns update_custom_test_range is allowed to SET
+_RANGE_UPDATE_COLUMNS = frozenset({
+    'range_name', 'age_min', 'age_max', 'gender', 'condition_name',
+    'normal_min', 'normal_max', 'critical_low', 'critical_high', 'notes', 'is_active'
+})
+
+# Demographic completeness score thresholds -> level (score >= bound moves up a level)
+_COMPLETENESS_BOUNDS = (25, 50, 100)
+_COMPLETENESS_LEVELS = ('poor', 'fair', 'good', 'excellent')
+
+# Distinct search terms search_patients remembers before starting over
+_SEARCH_CACHE_SIZE = 128
+
+# Shorter search terms list every patient instead of running a LIKE scan
+_MIN_SEARCH_LENGTH = 2
+
+# test_results indexes only reads rely on; bulk loads drop and rebuild them once
+# (idx_test_results_dup stays, the import's own duplicate check uses it)
+_DEFERRABLE_INDEXES = ('idx_test_results_patient_date',)
+
+# Result batches at least this large rebuild deferrable indexes instead of
+# updating them row by row
+_DEFER_INDEX_MIN_ROWS = 5_000
 
 class DatabaseManager:
     def __init__(self, db_path: str = "medical_test_data.db"):
         """Initialize database manager and create tables if they don't exist"""
         self.db_path = db_path
+        
+        # One long-lived connection per thread (see _conn) so sqlite3's statement
+        # cache is reused across calls instead of re-parsing the SQL every time
+        self._tls = threading.local()
+        
+        # Fixed SQL text for every hot statement (keys double as cache handles)
+        self._stmts = {
+            # Existing patient IDs are left untouched (rowcount 0) instead of raising
+            'insert_patient': '''
+                INSERT INTO patients 
+                (patient_id, first_name, last_name, age, gender, phone, email, address)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (patient_id) DO NOTHING
+            ''',
+            'patient_by_id': 'SELECT * FROM patients WHERE patient_id = ?',
+            'all_patients': 'SELECT * FROM patients ORDER BY last_name, first_name',
+            # Same columns as all_patients, with a missing age worked out from
+            # date_of_birth the way calculate_age does it
+            'all_patients_with_age': '''
+                SELECT patient_id, first_name, last_name, date_of_birth, gender, phone,
+                       email, address, created_date,
+                       COALESCE(age,
+                                CAST(strftime('%Y', 'now', 'localtime') AS INTEGER)
+                                - CAST(strftime('%Y', date_of_birth) AS INTEGER)
+                                - (strftime('%m-%d', 'now', 'localtime') < strftime('%m-%d', date_of_birth)))
+                FROM patients ORDER BY last_name, first_name
+            ''',
+            'insert_tr': '''
+                INSERT INTO test_results 
+                (patient_id, test_type_id, test_value, test_date, lab_technician, notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+                RETURNING result_id
+            ''',
+            # executemany form for unchecked bulk inserts (no RETURNING, positional rows)
+            'insert_tr_many': '''
+                INSERT INTO test_results 
+                (patient_id, test_type_id, test_value, test_date, lab_technician, notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''',
+            # Same patient, test type and value, plus either the same date (the date
+            # part of a datetime string) or a test_date within +/- :window seconds
+            'duplicate': '''
+                SELECT 1 FROM test_results 
+                WHERE patient_id = :patient_id AND test_type_id = :test_type_id
+                AND test_value = :test_value
+                AND (test_date = CASE WHEN strftime('%s', :test_date) IS NULL THEN :test_date
+                                      ELSE substr(:test_date, 1, 10) END
+                     OR (:window > 0 AND test_date_epoch
+                         BETWEEN CAST(strftime('%s', :test_date) AS INTEGER) - :window
+                             AND CAST(strftime('%s', :test_date) AS INTEGER) + :window))
+                LIMIT 1
+            ''',
+            'patient_results': '''
+                SELECT result_id, patient_id, test_type_id, test_value, test_date,
+                       lab_technician, notes
+                FROM test_results
+                WHERE patient_id = ?
+                ORDER BY test_date DESC
+            ''',
+            'all_results': '''
+                SELECT result_id, patient_id, test_type_id, test_value, test_date,
+                       lab_technician, notes
+                FROM test_results
+                ORDER BY patient_id, test_date DESC
+            ''',
+            'all_test_types': '''
+                SELECT test_type_id, test_name, normal_min, normal_max, unit, description, category,
+                       critical_low, critical_high, method 
+                FROM test_types ORDER BY test_name
+            ''',
+            'test_type_by_name': '''
+                SELECT test_type_id, test_name, normal_min, normal_max, unit, description, category,
+                       critical_low, critical_high, method 
+                FROM test_types WHERE test_name = ?
+            ''',
+            'test_type_by_id': '''
+                SELECT test_type_id, test_name, normal_min, normal_max, unit, description, category,
+                       critical_low, critical_high, method 
+                FROM test_types WHERE test_type_id = ?
+            ''',
+            'insert_test_type': '''
+                INSERT INTO test_types (test_name, description, unit, normal_min, normal_max, 
+                                      category, critical_low, critical_high, method)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING test_type_id
+            ''',
+            'insert_missing_test_type': '''
+                INSERT INTO test_types (test_name, description, unit) VALUES (?, ?, ?)
+                ON CONFLICT(test_name) DO NOTHING
+            ''',
+            'test_type_ids': 'SELECT test_name, test_type_id FROM test_types',
+            'update_test_type': '''
+                UPDATE test_types 
+                SET test_name = ?, description = ?, unit = ?, normal_min = ?, normal_max = ?, 
+                    category = ?, critical_low = ?, critical_high = ?, method = ?
+                WHERE test_type_id = ?
+            ''',
+            'delete_patient': 'DELETE FROM patients WHERE patient_id = ?',
+            'delete_result': 'DELETE FROM test_results WHERE result_id = ?',
+            'delete_test_type': 'DELETE FROM test_types WHERE test_type_id = ?',
+            'search_patients': '''
+                SELECT * FROM patients 
+                WHERE patient_id LIKE ? OR first_name LIKE ? OR last_name LIKE ?
+                ORDER BY last_name, first_name
+            ''',
+            'search_patients_fts': '''
+                SELECT p.* FROM patients p
+                JOIN patients_fts f ON p.rowid = f.rowid
+                WHERE patients_fts MATCH ?
+                ORDER BY p.last_name, p.first_name
+            ''',
+            'table_counts': '''
+                SELECT (SELECT COUNT(*) FROM patients),
+                       (SELECT COUNT(*) FROM test_results),
+                       (SELECT COUNT(*) FROM test_types)
+            ''',
+            'insert_range': '''
+                INSERT INTO custom_test_ranges 
+                (test_type_id, range_name, age_min, age_max, gender, condition_name,
+                 normal_min, normal_max, critical_low, critical_high, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING range_id
+            ''',
+            'bulk_insert_range': '''
+                INSERT INTO custom_test_ranges 
+                (test_type_id, range_name, age_min, age_max, gender, condition_name,
+                 normal_min, normal_max, critical_low, critical_high, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            'ranges_for_type': '''
+                SELECT ctr.*, tt.test_name 
+                FROM custom_test_ranges ctr
+                JOIN test_types tt ON ctr.test_type_id = tt.test_type_id
+                WHERE ctr.test_type_id = ? AND ctr.is_active = 1
+                ORDER BY ctr.range_name
+            ''',
+            'best_range': '''
+                SELECT ctr.*, tt.test_name
+                FROM custom_test_ranges ctr
+                JOIN test_types tt ON ctr.test_type_id = tt.test_type_id
+                WHERE ctr.test_type_id = :test_type_id AND ctr.is_active = 1
+                AND (:age IS NULL OR ctr.age_min IS NULL OR ctr.age_min <= :age)
+                AND (:age IS NULL OR ctr.age_max IS NULL OR ctr.age_max >= :age)
+                AND (:gender IS NULL OR ctr.gender IS NULL OR ctr.gender = :gender)
+                AND (:condition IS NULL OR ctr.condition_name IS NULL OR ctr.condition_name = :condition)
+                ORDER BY 
+                    (CASE WHEN ctr.condition_name IS NOT NULL THEN 4 ELSE 0 END) +
+                    (CASE WHEN ctr.gender IS NOT NULL THEN 2 ELSE 0 END) +
+                    (CASE WHEN ctr.age_min IS NOT NULL OR ctr.age_max IS NOT NULL THEN 1 ELSE 0 END) DESC,
+                    ctr.range_name
+                LIMIT 1
+            ''',
+            'all_ranges': '''
+                SELECT ctr.*, tt.test_name 
+                FROM custom_test_ranges ctr
+                JOIN test_types tt ON ctr.test_type_id = tt.test_type_id
+                WHERE ctr.is_active = 1
+                ORDER BY tt.test_name, ctr.range_name
+            ''',
+            'deactivate_range': 'UPDATE custom_test_ranges SET is_active = 0 WHERE range_id = ?',
+            'upsert_setting': '''
+                INSERT OR REPLACE INTO lab_settings 
+                (setting_name, setting_value, setting_type, description, updated_date)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''',
+            'setting_by_name': 'SELECT setting_value FROM lab_settings WHERE setting_name = ?',
+            'all_settings': '''
+                SELECT setting_name, setting_value, setting_type, description, updated_date 
+                FROM lab_settings ORDER BY setting_name
+            ''',
+        }
+        # Bulk insert that skips rows the duplicate probe would flag; the probe
+        # also sees rows inserted earlier in the same executemany batch
+        self._stmts['bulk_insert_tr'] = f'''
+            INSERT INTO test_results 
+            (patient_id, test_type_id, test_value, test_date, lab_technician, notes)
+            SELECT :patient_id, :test_type_id, :test_value, :test_date, :lab_technician, :notes
+            WHERE NOT :check_duplicates OR NOT EXISTS ({self._stmts['duplicate']})
+        '''
+        # Single-row form: the duplicate check and the insert are one statement
+        self._stmts['insert_tr_checked'] = self._stmts['bulk_insert_tr'] + 'RETURNING result_id'
+        
+        # Memoized lookups for the small, rarely-changing test type / range tables.
+        # Cleared by every method that writes test_types or custom_test_ranges.
+        self._test_types_cache = None
+        self._test_type_by_name_cache = {}
+        self._test_type_by_id_cache = {}
+        self._adjusted_range_cache = {}
+        
+        # search term -> matching patient rows; cleared by every method that writes patients
+        self._search_cache = {}
+        
+        # Sorted column tuple -> UPDATE custom_test_ranges SQL
+        self._update_range_sql_cache = {}
+        
         self.init_database()
     
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection, opened and configured on first use"""
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
+            self._configure(conn)
+            self._tls.conn = conn
+        return conn
+    
+    @staticmethod
+    def _configure(conn: sqlite3.Connection):
+        """Apply per-connection PRAGMAs (WAL journal, relaxed fsync, in-memory temp tables)"""
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        conn.execute('PRAGMA cache_size = -64000')
+        # Read pages straight from a memory map (up to 256 MB) instead of copying them
+        conn.execute('PRAGMA mmap_size = 268435456')
+        # Child rows are removed by ON DELETE CASCADE
+        conn.execute('PRAGMA foreign_keys = ON')
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes into one transaction on this thread's connection.
+        
+        Write methods run inside this too: the outermost block commits (or rolls
+        back on an exception) and nested blocks become savepoints, so a failing
+        call inside a long import only undoes its own changes.
+        """
+        conn = self._conn
+        depth = getattr(self._tls, 'tx_depth', 0)
+        if depth == 0:
+            self._tls.tx_depth = 1
+            try:
+                with conn:
+                    # Explicit BEGIN so releasing a savepoint never commits early
+                    if not conn.in_transaction:
+                        conn.execute('BEGIN')
+                    yield conn
+            except BaseException:
+                # Lookups cached during the transaction may name rolled-back rows
+                self._clear_test_type_cache()
+                raise
+            finally:
+                self._tls.tx_depth = 0
+        else:
+            savepoint = f'sp_{depth}'
+            conn.execute(f'SAVEPOINT {savepoint}')
+            self._tls.tx_depth = depth + 1
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute(f'ROLLBACK TO {savepoint}')
+                    conn.execute(f'RELEASE {savepoint}')
+                raise
+            else:
+                conn.execute(f'RELEASE {savepoint}')
+            finally:
+                self._tls.tx_depth = depth
+    
     def init_database(self):
         """Initialize the database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        # Table rebuilds in _ensure_schema copy rows that may predate foreign key
+        # enforcement; the PRAGMA is a no-op inside a transaction, so toggle it here
+        self._conn.execute('PRAGMA foreign_keys = OFF')
+        try:
+            self._create_tables()
+        finally:
+            self._conn.execute('PRAGMA foreign_keys = ON')
+    
+    def _create_tables(self):
+        """Create missing tables and bring older schemas up to date"""
+        with self._conn as conn:
             cursor = conn.cursor()
             
             # Patients table
@@ -47,44 +383,6 @@ class DatabaseManager:
                 )
             ''')
             
-            # Add category column if it doesn't exist (for existing databases)
-            try:
-                cursor.execute('ALTER TABLE test_types ADD COLUMN category TEXT')
-                conn.commit()
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-            
-            # Add critical threshold columns if they don't exist
-            try:
-                cursor.execute('ALTER TABLE test_types ADD COLUMN critical_low REAL')
-                conn.commit()
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-                
-            try:
-                cursor.execute('ALTER TABLE test_types ADD COLUMN critical_high REAL')
-                conn.commit()
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-                
-            try:
-                cursor.execute('ALTER TABLE test_types ADD COLUMN method TEXT')
-                conn.commit()
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-                
-            # Add age column to patients table if it doesn't exist
-            try:
-                cursor.execute('ALTER TABLE patients ADD COLUMN age INTEGER')
-                conn.commit()
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-            
             # Test results table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS test_results (
@@ -96,8 +394,8 @@ class DatabaseManager:
                     lab_technician TEXT,
                     notes TEXT,
                     created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (patient_id) REFERENCES patients (patient_id),
-                    FOREIGN KEY (test_type_id) REFERENCES test_types (test_type_id)
+                    FOREIGN KEY (patient_id) REFERENCES patients (patient_id) ON DELETE CASCADE,
+                    FOREIGN KEY (test_type_id) REFERENCES test_types (test_type_id) ON DELETE CASCADE
                 )
             ''')
             
@@ -118,7 +416,7 @@ class DatabaseManager:
                     is_active BOOLEAN DEFAULT 1,
                     created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     notes TEXT,
-                    FOREIGN KEY (test_type_id) REFERENCES test_types (test_type_id)
+                    FOREIGN KEY (test_type_id) REFERENCES test_types (test_type_id) ON DELETE CASCADE
                 )
             ''')
             
@@ -134,40 +432,151 @@ class DatabaseManager:
                 )
             ''')
             
-            conn.commit()
+            self._ensure_schema(cursor)
+    
+    def _ensure_schema(self, cursor):
+        """Add columns introduced after the original schema (runs once at startup)"""
+        cursor.execute('PRAGMA table_info(test_types)')
+        test_type_columns = {row[1] for row in cursor.fetchall()}
+        for column, column_type in (('category', 'TEXT'), ('critical_low', 'REAL'),
+                                    ('critical_high', 'REAL'), ('method', 'TEXT')):
+            if column not in test_type_columns:
+                cursor.execute(f'ALTER TABLE test_types ADD COLUMN {column} {column_type}')
+        
+        # Age column on patients (appended, so it stays at position 9)
+        cursor.execute('PRAGMA table_info(patients)')
+        patient_columns = {row[1] for row in cursor.fetchall()}
+        if 'age' not in patient_columns:
+            cursor.execute('ALTER TABLE patients ADD COLUMN age INTEGER')
+        
+        # Older databases were created without ON DELETE CASCADE
+        for table in ('test_results', 'custom_test_ranges'):
+            cursor.execute(f'PRAGMA foreign_key_list({table})')
+            if any(fk[6] != 'CASCADE' for fk in cursor.fetchall()):
+                self._rebuild_with_cascade(cursor, table)
+        
+        # Integer copy of test_date for duplicate-window lookups. ALTER TABLE can
+        # only add VIRTUAL generated columns; the index below stores the values.
+        cursor.execute('PRAGMA table_xinfo(test_results)')
+        result_columns = {row[1] for row in cursor.fetchall()}
+        if 'test_date_epoch' not in result_columns:
+            cursor.execute('''
+                ALTER TABLE test_results ADD COLUMN test_date_epoch INTEGER
+                GENERATED ALWAYS AS (CAST(strftime('%s', test_date) AS INTEGER)) VIRTUAL
+            ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_test_results_dup
+            ON test_results (patient_id, test_type_id, test_date_epoch)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_test_results_patient_date
+            ON test_results (patient_id, test_date DESC)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_ctr_lookup
+            ON custom_test_ranges (test_type_id, is_active, gender, condition_name, age_min, age_max)
+        ''')
+        
+        self._ensure_patient_search_index(cursor)
+    
+    def _rebuild_with_cascade(self, cursor, table: str):
+        """Recreate a table so its foreign keys use ON DELETE CASCADE
+        
+        SQLite cannot alter constraints in place, so the table is copied into a
+        new one built from its stored CREATE statement and then renamed back.
+        """
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        create_sql = cursor.fetchone()[0]
+        create_sql = re.sub(r'^CREATE TABLE\s+"?\w+"?', f'CREATE TABLE {table}_new', create_sql)
+        create_sql = re.sub(r'(REFERENCES\s+\w+\s*\([^)]*\))(?!\s*ON DELETE)',
+                            r'\1 ON DELETE CASCADE', create_sql)
+        
+        # Generated columns (hidden = 2 or 3) are recomputed, not copied
+        cursor.execute(f'PRAGMA table_xinfo({table})')
+        columns = ', '.join(row[1] for row in cursor.fetchall() if row[5] == 0)
+        
+        cursor.execute(create_sql)
+        cursor.execute(f'INSERT INTO {table}_new ({columns}) SELECT {columns} FROM {table}')
+        cursor.execute(f'DROP TABLE {table}')
+        cursor.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+    
+    def _ensure_patient_search_index(self, cursor):
+        """Create the FTS5 trigram index used by search_patients, if SQLite supports it"""
+        cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'patients_fts'")
+        row = cursor.fetchone()
+        exists = row is not None
+        if exists and 'trigram' not in row[0]:
+            # Word-tokenized index from an older version; rebuild it as trigrams
+            for trigger in ('patients_fts_ai', 'patients_fts_ad', 'patients_fts_au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute('DROP TABLE patients_fts')
+            exists = False
+        try:
+            # Trigrams keep the substring matching of the LIKE search
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+                    patient_id, first_name, last_name,
+                    content='patients', content_rowid='rowid', tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 (or older than 3.34) - search_patients falls back to LIKE
+            self._has_patient_fts = False
+            return
+        self._has_patient_fts = True
+        
+        # Keep the external-content index in sync with the patients table
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+                INSERT INTO patients_fts(rowid, patient_id, first_name, last_name)
+                VALUES (new.rowid, new.patient_id, new.first_name, new.last_name);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+                INSERT INTO patients_fts(patients_fts, rowid, patient_id, first_name, last_name)
+                VALUES ('delete', old.rowid, old.patient_id, old.first_name, old.last_name);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE ON patients BEGIN
+                INSERT INTO patients_fts(patients_fts, rowid, patient_id, first_name, last_name)
+                VALUES ('delete', old.rowid, old.patient_id, old.first_name, old.last_name);
+                INSERT INTO patients_fts(rowid, patient_id, first_name, last_name)
+                VALUES (new.rowid, new.patient_id, new.first_name, new.last_name);
+            END
+        ''')
+        
+        # Index patients that were added before the FTS table existed
+        if not exists:
+            cursor.execute("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')")
     
     # REMOVED: insert_default_test_types method completely eliminated
     
     def add_patient(self, patient_id: str, first_name: str = None, last_name: str = None, 
                    age: int = None, gender: str = None, 
                    phone: str = None, email: str = None, address: str = None) -> bool:
-        """Add a new patient to the database"""
+        """Add a new patient to the database; False if the patient ID already exists"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO patients 
-                    (patient_id, first_name, last_name, age, gender, phone, email, address)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (patient_id, first_name, last_name, age, gender, phone, email, address))
-                conn.commit()
-                return True
+            with self.transaction():
+                cursor = self._conn.execute(self._stmts['insert_patient'],
+                                            (patient_id, first_name, last_name, age, gender, phone, email, address))
+                self._search_cache.clear()
+                return cursor.rowcount > 0
         except sqlite3.IntegrityError:
-            return False  # Patient ID already exists
+            return False
     
     def get_patient(self, patient_id: str) -> Optional[Tuple]:
         """Get patient information by ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM patients WHERE patient_id = ?', (patient_id,))
-            return cursor.fetchone()
+        return self._conn.execute(self._stmts['patient_by_id'], (patient_id,)).fetchone()
     
     def get_all_patients(self) -> List[Tuple]:
         """Get all patients from the database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM patients ORDER BY last_name, first_name')
-            return cursor.fetchall()
+        return self._conn.execute(self._stmts['all_patients']).fetchall()
+    
+    def get_all_patients_with_age(self) -> List[Tuple]:
+        """Get all patients, filling in age from date of birth where it is not stored"""
+        return self._conn.execute(self._stmts['all_patients_with_age']).fetchall()
     
     def update_patient(self, patient_id: str, **kwargs) -> bool:
         """Update patient information"""
@@ -178,19 +587,18 @@ class DatabaseManager:
         values = list(kwargs.values()) + [patient_id]
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(f'''
+            with self.transaction():
+                cursor = self._conn.execute(f'''
                     UPDATE patients SET {set_clause} WHERE patient_id = ?
                 ''', values)
-                conn.commit()
+                self._search_cache.clear()
                 return cursor.rowcount > 0
         except sqlite3.Error:
             return False
     
     def add_test_result(self, patient_id: str, test_type_id: int, test_value: float, 
                        test_date: str, lab_technician: str = None, notes: str = None, 
-                       check_duplicates: bool = True) -> bool:
+                       check_duplicates: bool = True) -> Optional[int]:
         """
         Add a new test result
         
@@ -204,25 +612,96 @@ class DatabaseManager:
             check_duplicates: Whether to check for duplicates before adding (default: True)
             
         Returns:
-            True if added successfully, False if duplicate found or error occurred
+            The new result_id, or None if duplicate found or error occurred
         """
+        # Store date/datetime objects as the same text either branch would
+        if isinstance(test_date, datetime):
+            test_date = test_date.strftime('%Y-%m-%d %H:%M:%S')
+        elif isinstance(test_date, date):
+            test_date = test_date.isoformat()
+        
         try:
-            # Check for duplicates if requested
-            if check_duplicates:
-                if self.check_duplicate_test_result(patient_id, test_type_id, test_value, test_date):
-                    return False  # Duplicate found, don't add
+            if not check_duplicates:
+                with self.transaction():
+                    return self._conn.execute(self._stmts['insert_tr'],
+                                              (patient_id, test_type_id, test_value, test_date,
+                                               lab_technician, notes)).fetchone()[0]
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO test_results 
-                    (patient_id, test_type_id, test_value, test_date, lab_technician, notes)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (patient_id, test_type_id, test_value, test_date, lab_technician, notes))
-                conn.commit()
-                return True
+            # The INSERT only selects a row when check_duplicate_test_result would
+            # find no match, so a duplicate returns no result_id
+            with self.transaction():
+                row = self._conn.execute(self._stmts['insert_tr_checked'], {
+                    'patient_id': patient_id,
+                    'test_type_id': test_type_id,
+                    'test_value': test_value,
+                    'test_date': test_date,
+                    'lab_technician': lab_technician,
+                    'notes': notes,
+                    'check_duplicates': True,
+                    'window': 30 * 60,
+                }).fetchone()
+            return row[0] if row else None
         except sqlite3.Error:
-            return False
+            return None
+    
+    def bulk_import_rows(self, patient_rows: List[Tuple], test_rows: List[Tuple],
+                         check_duplicates: bool = True, tolerance_minutes: int = 30) -> Optional[int]:
+        """
+        Insert many patients and test results in a single transaction.
+        
+        Args:
+            patient_rows: (patient_id, first_name, last_name, age, gender, phone, email, address)
+                tuples; patients that already exist are left unchanged
+            test_rows: (patient_id, test_type_id, test_value, test_date, lab_technician, notes) tuples
+            check_duplicates: Skip results check_duplicate_test_result would flag,
+                including repeats within test_rows
+            tolerance_minutes: Time tolerance in minutes for the duplicate check
+            
+        Returns:
+            Number of test results inserted, or None if the transaction was rolled back
+        """
+        columns = ('patient_id', 'test_type_id', 'test_value', 'test_date', 'lab_technician', 'notes')
+        extra = {'check_duplicates': True, 'window': tolerance_minutes * 60}
+        try:
+            with self.transaction():
+                deferred_indexes = []
+                if len(test_rows) >= _DEFER_INDEX_MIN_ROWS:
+                    deferred_indexes = self.drop_nonessential_indexes()
+                self._conn.executemany(self._stmts['insert_patient'], patient_rows)
+                self._search_cache.clear()
+                if check_duplicates:
+                    cursor = self._conn.executemany(
+                        self._stmts['bulk_insert_tr'],
+                        (dict(zip(columns, row), **extra) for row in test_rows))
+                else:
+                    cursor = self._conn.executemany(self._stmts['insert_tr_many'], test_rows)
+                self.restore_indexes(deferred_indexes)
+                return max(cursor.rowcount, 0)
+        except sqlite3.Error:
+            return None
+    
+    def drop_nonessential_indexes(self) -> List[str]:
+        """
+        Drop the test_results indexes a bulk load does not need.
+        
+        Call inside a transaction and pass the result to restore_indexes once
+        the rows are in; a rollback brings the indexes back by itself.
+        
+        Returns:
+            CREATE INDEX statements for the indexes that were dropped
+        """
+        placeholders = ', '.join('?' * len(_DEFERRABLE_INDEXES))
+        ddl = [row[0] for row in self._conn.execute(f'''
+            SELECT sql FROM sqlite_master WHERE type = 'index' AND name IN ({placeholders})
+        ''', _DEFERRABLE_INDEXES)]
+        for index_name in _DEFERRABLE_INDEXES:
+            self._conn.execute(f'DROP INDEX IF EXISTS {index_name}')
+        return ddl
+    
+    def restore_indexes(self, ddl: List[str]):
+        """Recreate indexes dropped by drop_nonessential_indexes"""
+        for statement in ddl:
+            self._conn.execute(statement)
     
     def check_duplicate_test_result(self, patient_id: str, test_type_id: int, test_value: float, 
                                    test_date: str, tolerance_minutes: int = 30) -> bool:
@@ -240,159 +719,191 @@ class DatabaseManager:
             True if a duplicate is found, False otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Convert test_date to datetime for comparison if it's a string
-                if isinstance(test_date, str):
-                    try:
-                        test_datetime = datetime.strptime(test_date, '%Y-%m-%d')
-                        test_date_str = test_date
-                    except ValueError:
-                        try:
-                            test_datetime = datetime.strptime(test_date, '%Y-%m-%d %H:%M:%S')
-                            test_date_str = test_datetime.strftime('%Y-%m-%d')
-                        except ValueError:
-                            # If date parsing fails, use exact string match
-                            test_date_str = test_date
-                            test_datetime = None
-                else:
-                    test_datetime = test_date
-                    test_date_str = test_date.strftime('%Y-%m-%d')
-                
-                # Check for exact matches first (same patient, test type, value, and date)
-                cursor.execute('''
-                    SELECT COUNT(*) FROM test_results 
-                    WHERE patient_id = ? AND test_type_id = ? AND test_value = ? AND test_date = ?
-                ''', (patient_id, test_type_id, test_value, test_date_str))
-                
-                exact_count = cursor.fetchone()[0]
-                if exact_count > 0:
-                    return True
-                
-                # If we have datetime information, check for near-duplicate times
-                if test_datetime and tolerance_minutes > 0:
-                    # Calculate time range for near-duplicates
-                    from datetime import timedelta
-                    start_time = test_datetime - timedelta(minutes=tolerance_minutes)
-                    end_time = test_datetime + timedelta(minutes=tolerance_minutes)
-                    
-                    start_date_str = start_time.strftime('%Y-%m-%d')
-                    end_date_str = end_time.strftime('%Y-%m-%d')
-                    
-                    # Check for near-duplicates within time tolerance
-                    cursor.execute('''
-                        SELECT COUNT(*) FROM test_results 
-                        WHERE patient_id = ? AND test_type_id = ? AND test_value = ? 
-                        AND test_date BETWEEN ? AND ?
-                    ''', (patient_id, test_type_id, test_value, start_date_str, end_date_str))
-                    
-                    near_count = cursor.fetchone()[0]
-                    if near_count > 0:
-                        return True
-                
-                return False
-                
+            if not isinstance(test_date, str):
+                test_date = test_date.strftime('%Y-%m-%d %H:%M:%S')
+            
+            # Date parsing and the tolerance window are evaluated by SQLite
+            cursor = self._conn.execute(self._stmts['duplicate'], {
+                'patient_id': patient_id,
+                'test_type_id': test_type_id,
+                'test_value': test_value,
+                'test_date': test_date,
+                'window': tolerance_minutes * 60,
+            })
+            return cursor.fetchone() is not None
         except sqlite3.Error:
             # If there's a database error, assume no duplicate to allow import
             return False
     
     def get_patient_test_results(self, patient_id: str) -> List[Tuple]:
         """Get all test results for a specific patient"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT tr.result_id, tr.patient_id, tt.test_name, tr.test_value, 
-                       tt.normal_min, tt.normal_max, tt.unit, tr.test_date,
-                       tr.lab_technician, tr.notes
-                FROM test_results tr
-                JOIN test_types tt ON tr.test_type_id = tt.test_type_id
-                WHERE tr.patient_id = ?
-                ORDER BY tr.test_date DESC
-            ''', (patient_id,))
-            return cursor.fetchall()
+        return self._patient_results(patient_id, with_method=False)
     
     def get_patient_test_results_with_method(self, patient_id: str) -> List[Tuple]:
         """Get all test results for a specific patient including method information"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT tr.result_id, tr.patient_id, tt.test_name, tr.test_value, 
+        return self._patient_results(patient_id, with_method=True)
+    
+    def _patient_results(self, patient_id: str, with_method: bool) -> List[Tuple]:
+        """Fetch a patient's results and attach test type fields from the type cache
+        
+        Rows are (result_id, patient_id, test_name, test_value, normal_min, normal_max,
+        unit, test_date, lab_technician, notes[, method]); results whose test type
+        no longer exists are skipped, as the old JOIN did.
+        """
+        results = self._conn.execute(self._stmts['patient_results'], (patient_id,)).fetchall()
+        return self._attach_test_types(results, with_method)
+    
+    def get_all_test_results_grouped_by_patient(self) -> Dict[str, List[Tuple]]:
+        """Get every patient's test results with one query, keyed by patient_id
+        
+        Each list holds get_patient_test_results rows, newest first; patients
+        without results are absent.
+        """
+        results = self._conn.execute(self._stmts['all_results']).fetchall()
+        rows = self._attach_test_types(results, with_method=False)
+        return {patient_id: list(group) for patient_id, group in groupby(rows, key=itemgetter(1))}
+    
+    def _attach_test_types(self, results, with_method: bool) -> List[Tuple]:
+        """Turn raw test_results rows into report rows using the test type cache"""
+        # Load any test types not cached yet in one query
+        type_cache = self._test_type_by_id_cache
+        missing = list({row[2] for row in results} - type_cache.keys())
+        if missing:
+            placeholders = ', '.join('?' * len(missing))
+            for test_type in self._conn.execute(f'''
+                SELECT test_type_id, test_name, normal_min, normal_max, unit, description, category,
+                       critical_low, critical_high, method
+                FROM test_types WHERE test_type_id IN ({placeholders})
+            ''', missing):
+                type_cache[test_type[0]] = test_type
+        
+        rows = []
+        for result_id, pid, test_type_id, test_value, test_date, technician, notes in results:
+            test_type = type_cache.get(test_type_id)
+            if test_type is None:
+                continue
+            row = (result_id, pid, test_type[1], test_value, test_type[2], test_type[3],
+                   test_type[4], test_date, technician, notes)
+            rows.append(row + (test_type[9],) if with_method else row)
+        return rows
+    
+    def get_results_with_ranges(self, patient_ids: Optional[List[str]] = None) -> List[Tuple]:
+        """Get test results joined with each patient's age/gender adjusted range in one query
+        
+        Rows are the get_patient_test_results columns followed by the adjusted
+        (normal_min, normal_max, critical_low, critical_high), ordered by patient
+        and newest result first. The best custom range is picked with the same
+        rules as get_age_gender_adjusted_range, using the patient's age and gender.
+        """
+        where, params = '', []
+        if patient_ids is not None:
+            if not patient_ids:
+                return []
+            where = f"WHERE tr.patient_id IN ({', '.join('?' * len(patient_ids))})"
+            params = list(patient_ids)
+        
+        return self._conn.execute(f'''
+            WITH matched AS (
+                SELECT tr.result_id, tr.patient_id, tt.test_name, tr.test_value,
                        tt.normal_min, tt.normal_max, tt.unit, tr.test_date,
-                       tr.lab_technician, tr.notes, tt.method
+                       tr.lab_technician, tr.notes, tt.critical_low, tt.critical_high,
+                       (SELECT ctr.range_id
+                        FROM custom_test_ranges ctr
+                        WHERE ctr.test_type_id = tr.test_type_id AND ctr.is_active = 1
+                        AND (p.age IS NULL OR ctr.age_min IS NULL OR ctr.age_min <= p.age)
+                        AND (p.age IS NULL OR ctr.age_max IS NULL OR ctr.age_max >= p.age)
+                        AND (NULLIF(p.gender, '') IS NULL OR ctr.gender IS NULL OR ctr.gender = p.gender)
+                        ORDER BY
+                            (CASE WHEN ctr.condition_name IS NOT NULL THEN 4 ELSE 0 END) +
+                            (CASE WHEN ctr.gender IS NOT NULL THEN 2 ELSE 0 END) +
+                            (CASE WHEN ctr.age_min IS NOT NULL OR ctr.age_max IS NOT NULL THEN 1 ELSE 0 END) DESC,
+                            ctr.range_name
+                        LIMIT 1) AS range_id
                 FROM test_results tr
                 JOIN test_types tt ON tr.test_type_id = tt.test_type_id
-                WHERE tr.patient_id = ?
-                ORDER BY tr.test_date DESC
-            ''', (patient_id,))
-            return cursor.fetchall()
+                LEFT JOIN patients p ON tr.patient_id = p.patient_id
+                {where}
+            )
+            SELECT m.result_id, m.patient_id, m.test_name, m.test_value, m.normal_min, m.normal_max,
+                   m.unit, m.test_date, m.lab_technician, m.notes,
+                   CASE WHEN ctr.range_id IS NOT NULL THEN ctr.normal_min
+                        WHEN m.normal_min IS NOT NULL AND m.normal_max IS NOT NULL THEN m.normal_min END,
+                   CASE WHEN ctr.range_id IS NOT NULL THEN ctr.normal_max
+                        WHEN m.normal_min IS NOT NULL AND m.normal_max IS NOT NULL THEN m.normal_max END,
+                   CASE WHEN ctr.range_id IS NOT NULL THEN COALESCE(ctr.critical_low, m.critical_low)
+                        WHEN m.normal_min IS NOT NULL AND m.normal_max IS NOT NULL THEN m.critical_low END,
+                   CASE WHEN ctr.range_id IS NOT NULL THEN COALESCE(ctr.critical_high, m.critical_high)
+                        WHEN m.normal_min IS NOT NULL AND m.normal_max IS NOT NULL THEN m.critical_high END
+            FROM matched m
+            LEFT JOIN custom_test_ranges ctr ON m.range_id = ctr.range_id
+            ORDER BY m.patient_id, m.test_date DESC
+        ''', params).fetchall()
     
     def get_test_types(self) -> List[Tuple]:
         """Get all available test types"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT test_type_id, test_name, normal_min, normal_max, unit, description, category,
-                       critical_low, critical_high, method 
-                FROM test_types ORDER BY test_name
-            ''')
-            return cursor.fetchall()
+        if self._test_types_cache is None:
+            self._test_types_cache = self._conn.execute(self._stmts['all_test_types']).fetchall()
+        return list(self._test_types_cache)
     
     def get_test_type_by_name(self, test_name: str) -> Optional[Tuple]:
         """Get test type by name"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT test_type_id, test_name, normal_min, normal_max, unit, description, category,
-                       critical_low, critical_high, method 
-                FROM test_types WHERE test_name = ?
-            ''', (test_name,))
-            return cursor.fetchone()
+        if test_name not in self._test_type_by_name_cache:
+            self._test_type_by_name_cache[test_name] = self._conn.execute(
+                self._stmts['test_type_by_name'], (test_name,)).fetchone()
+        return self._test_type_by_name_cache[test_name]
+    
+    def _clear_test_type_cache(self):
+        """Drop memoized test type and range lookups after a write"""
+        self._test_types_cache = None
+        self._test_type_by_name_cache.clear()
+        self._test_type_by_id_cache.clear()
+        self._adjusted_range_cache.clear()
     
     def add_test_type(self, test_name: str, description: str = None,
                      unit: str = None, normal_min: float = None, 
                      normal_max: float = None, category: str = None,
                      critical_low: float = None, critical_high: float = None,
-                     method: str = None) -> bool:
-        """Add a new test type with critical thresholds and method"""
+                     method: str = None) -> Optional[int]:
+        """Add a new test type with critical thresholds and method; returns its test_type_id"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # First, ensure critical threshold columns exist
-                try:
-                    cursor.execute('ALTER TABLE test_types ADD COLUMN critical_low REAL')
-                except sqlite3.OperationalError:
-                    pass  # Column already exists
-                try:
-                    cursor.execute('ALTER TABLE test_types ADD COLUMN critical_high REAL')
-                except sqlite3.OperationalError:
-                    pass  # Column already exists
-                try:
-                    cursor.execute('ALTER TABLE test_types ADD COLUMN method TEXT')
-                except sqlite3.OperationalError:
-                    pass  # Column already exists
-                
-                cursor.execute('''
-                    INSERT INTO test_types (test_name, description, unit, normal_min, normal_max, 
-                                          category, critical_low, critical_high, method)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (test_name, description, unit, normal_min, normal_max, category, critical_low, critical_high, method))
-                conn.commit()
-                return True
+            with self.transaction():
+                test_type_id = self._conn.execute(self._stmts['insert_test_type'],
+                                                  (test_name, description, unit, normal_min, normal_max,
+                                                   category, critical_low, critical_high, method)).fetchone()[0]
+            self._clear_test_type_cache()
+            return test_type_id
         except sqlite3.IntegrityError:
-            return False  # Test name already exists
+            return None  # Test name already exists
+    
+    def ensure_test_types(self, test_types: List[Tuple]) -> Optional[Dict[str, int]]:
+        """
+        Create any missing test types in one batch and map every test name to its id.
+        
+        Args:
+            test_types: (test_name, description, unit) tuples; names that already
+                exist are left unchanged and no ranges are preset for new ones
+            
+        Returns:
+            Dictionary of test_name -> test_type_id, or None on a database error
+        """
+        try:
+            with self.transaction():
+                cursor = self._conn.executemany(self._stmts['insert_missing_test_type'], test_types)
+                created = cursor.rowcount > 0
+                test_type_ids = dict(self._conn.execute(self._stmts['test_type_ids']).fetchall())
+            if created:
+                self._clear_test_type_cache()
+            return test_type_ids
+        except sqlite3.Error:
+            return None
     
     def delete_patient(self, patient_id: str) -> bool:
         """Delete a patient and all their test results"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                # Delete test results first (foreign key constraint)
-                cursor.execute('DELETE FROM test_results WHERE patient_id = ?', (patient_id,))
-                # Delete patient
-                cursor.execute('DELETE FROM patients WHERE patient_id = ?', (patient_id,))
-                conn.commit()
+            with self.transaction():
+                # Test results go with it via ON DELETE CASCADE
+                cursor = self._conn.execute(self._stmts['delete_patient'], (patient_id,))
+                self._search_cache.clear()
                 return cursor.rowcount > 0
         except sqlite3.Error:
             return False
@@ -400,24 +911,18 @@ class DatabaseManager:
     def delete_test_result(self, result_id: int) -> bool:
         """Delete a specific test result"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM test_results WHERE result_id = ?', (result_id,))
-                conn.commit()
+            with self.transaction():
+                cursor = self._conn.execute(self._stmts['delete_result'], (result_id,))
                 return cursor.rowcount > 0
         except sqlite3.Error:
             return False
     
     def get_test_type_by_id(self, test_type_id: int) -> Optional[Tuple]:
         """Get test type by ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT test_type_id, test_name, normal_min, normal_max, unit, description, category,
-                       critical_low, critical_high, method 
-                FROM test_types WHERE test_type_id = ?
-            ''', (test_type_id,))
-            return cursor.fetchone()
+        if test_type_id not in self._test_type_by_id_cache:
+            self._test_type_by_id_cache[test_type_id] = self._conn.execute(
+                self._stmts['test_type_by_id'], (test_type_id,)).fetchone()
+        return self._test_type_by_id_cache[test_type_id]
     
     def get_test_type(self, test_type_id: int) -> Optional[Tuple]:
         """Get test type by ID (alias for get_test_type_by_id)"""
@@ -431,45 +936,23 @@ class DatabaseManager:
                         method: Optional[str] = None) -> bool:
         """Update an existing test type with critical thresholds and method"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Ensure critical threshold columns exist
-                try:
-                    cursor.execute('ALTER TABLE test_types ADD COLUMN critical_low REAL')
-                except sqlite3.OperationalError:
-                    pass
-                try:
-                    cursor.execute('ALTER TABLE test_types ADD COLUMN critical_high REAL')
-                except sqlite3.OperationalError:
-                    pass
-                try:
-                    cursor.execute('ALTER TABLE test_types ADD COLUMN method TEXT')
-                except sqlite3.OperationalError:
-                    pass
-                
-                cursor.execute('''
-                    UPDATE test_types 
-                    SET test_name = ?, description = ?, unit = ?, normal_min = ?, normal_max = ?, 
-                        category = ?, critical_low = ?, critical_high = ?, method = ?
-                    WHERE test_type_id = ?
-                ''', (test_name, description, unit, normal_min, normal_max, category, critical_low, critical_high, method, test_type_id))
-                conn.commit()
-                return cursor.rowcount > 0
+            with self.transaction():
+                cursor = self._conn.execute(self._stmts['update_test_type'],
+                                            (test_name, description, unit, normal_min, normal_max, category,
+                                             critical_low, critical_high, method, test_type_id))
+            self._clear_test_type_cache()
+            return cursor.rowcount > 0
         except sqlite3.IntegrityError:
             return False
     
     def delete_test_type(self, test_type_id: int) -> bool:
         """Delete a test type and all associated test results"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                # First delete all test results of this type
-                cursor.execute('DELETE FROM test_results WHERE test_type_id = ?', (test_type_id,))
-                # Then delete the test type
-                cursor.execute('DELETE FROM test_types WHERE test_type_id = ?', (test_type_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+            with self.transaction():
+                # Test results and custom ranges go with it via ON DELETE CASCADE
+                cursor = self._conn.execute(self._stmts['delete_test_type'], (test_type_id,))
+            self._clear_test_type_cache()
+            return cursor.rowcount > 0
         except sqlite3.Error:
             return False
     
@@ -479,39 +962,51 @@ class DatabaseManager:
         return None
     
     def search_patients(self, search_term: str) -> List[Tuple]:
-        """Search patients by name or ID"""
+        """Search patients by name or ID
+        
+        Matches the search term anywhere in the ID or name columns, through the
+        FTS5 trigram index when available and the term is at least 3 characters
+        long, otherwise with a LIKE scan. Terms shorter than 2 characters list
+        every patient, as an empty search does, rather than scanning for a single
+        character. Results are remembered per search term until the patients
+        table is next written.
+        """
+        search_term = search_term.strip()
+        if len(search_term) < _MIN_SEARCH_LENGTH:
+            return self.get_all_patients()
+        
+        if search_term not in self._search_cache:
+            if len(self._search_cache) >= _SEARCH_CACHE_SIZE:
+                self._search_cache.clear()
+            self._search_cache[search_term] = self._search_patients(search_term)
+        return list(self._search_cache[search_term])
+    
+    def _search_patients(self, search_term: str) -> List[Tuple]:
+        """Run the patient search query for a stripped, non-empty term"""
+        # Trigrams cannot match terms shorter than 3 characters
+        if self._has_patient_fts and len(search_term) >= 3:
+            # Quote as a phrase so punctuation in IDs is not parsed as FTS syntax
+            match_expr = '"' + search_term.replace('"', '""') + '"'
+            try:
+                return self._conn.execute(self._stmts['search_patients_fts'], (match_expr,)).fetchall()
+            except sqlite3.OperationalError:
+                pass
+        
         search_pattern = f"%{search_term}%"
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM patients 
-                WHERE patient_id LIKE ? OR first_name LIKE ? OR last_name LIKE ?
-                ORDER BY last_name, first_name
-            ''', (search_pattern, search_pattern, search_pattern))
-            return cursor.fetchall()
+        return self._conn.execute(self._stmts['search_patients'],
+                                  (search_pattern, search_pattern, search_pattern)).fetchall()
     
     def get_database_stats(self) -> dict:
         """Get basic statistics about the database"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Count patients
-            cursor.execute('SELECT COUNT(*) FROM patients')
-            patient_count = cursor.fetchone()[0]
-            
-            # Count test results
-            cursor.execute('SELECT COUNT(*) FROM test_results')
-            result_count = cursor.fetchone()[0]
-            
-            # Count test types
-            cursor.execute('SELECT COUNT(*) FROM test_types')
-            test_type_count = cursor.fetchone()[0]
-            
-            return {
-                'patients': patient_count,
-                'test_results': result_count,
-                'test_types': test_type_count
-            }
+        # Count patients, test results and test types in one round trip
+        patient_count, result_count, test_type_count = \
+            self._conn.execute(self._stmts['table_counts']).fetchone()
+        
+        return {
+            'patients': patient_count,
+            'test_results': result_count,
+            'test_types': test_type_count
+        }
     
     def get_patient_demographics_summary(self, patient_id: str) -> dict:
         """Get a summary of patient demographics with missing value indicators"""
@@ -556,29 +1051,25 @@ class DatabaseManager:
             completeness['recommendations'].append('Add gender for gender-specific normal ranges')
         
         # Determine level
-        if completeness['score'] >= 100:
-            completeness['level'] = 'excellent'
-        elif completeness['score'] >= 50:
-            completeness['level'] = 'good'
-        elif completeness['score'] >= 25:
-            completeness['level'] = 'fair'
-        else:
-            completeness['level'] = 'poor'
+        completeness['level'] = _COMPLETENESS_LEVELS[
+            bisect.bisect_right(_COMPLETENESS_BOUNDS, completeness['score'])]
             
         return completeness
     
-    def calculate_age(self, date_of_birth: str) -> Optional[int]:
-        """Calculate age from date of birth"""
+    def calculate_age(self, date_of_birth: str, today: Optional[datetime] = None) -> Optional[int]:
+        """Calculate age from date of birth
+        
+        Pass ``today`` when computing ages for a batch so the clock is read once.
+        """
         if not date_of_birth:
             return None
         try:
-            from datetime import datetime
             birth_date = datetime.strptime(date_of_birth, '%Y-%m-%d')
-            today = datetime.now()
-            age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-            return age
-        except:
+        except (TypeError, ValueError):
             return None
+        if today is None:
+            today = datetime.now()
+        return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
     
     def get_age_gender_adjusted_range(self, test_name: str, age: Optional[int], gender: Optional[str], condition: Optional[str] = None) -> dict:
         """Get age and gender adjusted normal ranges for medical tests
@@ -588,21 +1079,88 @@ class DatabaseManager:
         2. User-configured database ranges (YOUR SETTINGS) 
         3. Hardcoded age/gender adjustments (FALLBACK ONLY)
         """
-        # First, try to get a custom range that matches the patient characteristics
-        custom_range = self.get_best_matching_range(test_name, age, gender, condition)
+        return self.get_age_gender_adjusted_range_batch([(test_name, age, gender, condition)])[0]
+    
+    def get_age_gender_adjusted_range_batch(self, rows) -> List[dict]:
+        """Get adjusted ranges for many (test_name, age, gender[, condition]) rows
         
-        # Get the base test type for fallback values
-        test_type = self.get_test_type_by_name(test_name)
+        Test types and active custom ranges for every uncached test name are
+        loaded with one query each; matching then happens in Python.
+        
+        Returns:
+            One range dict per input row, in the same order
+        """
+        keys = [tuple(row) + (None,) * (4 - len(row)) for row in rows]
+        missing = {key for key in keys if key not in self._adjusted_range_cache}
+        
+        if missing:
+            test_names = sorted({key[0] for key in missing})
+            placeholders = ', '.join('?' * len(test_names))
+            test_types = {row[1]: row for row in self._conn.execute(f'''
+                SELECT test_type_id, test_name, normal_min, normal_max, unit, description, category,
+                       critical_low, critical_high, method
+                FROM test_types WHERE test_name IN ({placeholders})
+            ''', test_names)}
+            
+            ranges_by_type = {}
+            if test_types:
+                type_ids = [test_type[0] for test_type in test_types.values()]
+                placeholders = ', '.join('?' * len(type_ids))
+                cursor = self._conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                for row in cursor.execute(f'''
+                    SELECT ctr.*, tt.test_name
+                    FROM custom_test_ranges ctr
+                    JOIN test_types tt ON ctr.test_type_id = tt.test_type_id
+                    WHERE ctr.is_active = 1 AND ctr.test_type_id IN ({placeholders})
+                ''', type_ids):
+                    ranges_by_type.setdefault(row['test_type_id'], []).append(dict(row))
+            
+            for key in missing:
+                test_name, age, gender, condition = key
+                test_type = test_types.get(test_name)
+                custom_range = None
+                if test_type:
+                    custom_range = self._pick_best_range(ranges_by_type.get(test_type[0], ()),
+                                                         age, gender, condition)
+                self._adjusted_range_cache[key] = self._build_adjusted_range(
+                    test_type, custom_range, age, gender)
+        
+        return [dict(self._adjusted_range_cache[key]) for key in keys]
+    
+    @staticmethod
+    def _pick_best_range(ranges, age: Optional[int], gender: Optional[str],
+                         condition: Optional[str]) -> Optional[dict]:
+        """Python counterpart of the best_range statement for preloaded ranges"""
+        gender = gender or None
+        condition = condition or None
+        best, best_key = None, None
+        for custom_range in ranges:
+            if age is not None:
+                if custom_range['age_min'] is not None and custom_range['age_min'] > age:
+                    continue
+                if custom_range['age_max'] is not None and custom_range['age_max'] < age:
+                    continue
+            if gender and custom_range['gender'] is not None and custom_range['gender'] != gender:
+                continue
+            if condition and custom_range['condition_name'] is not None \
+                    and custom_range['condition_name'] != condition:
+                continue
+            
+            # Same specificity score as get_best_matching_range, ties by range name
+            score = ((4 if custom_range['condition_name'] is not None else 0) +
+                     (2 if custom_range['gender'] is not None else 0) +
+                     (1 if custom_range['age_min'] is not None or custom_range['age_max'] is not None else 0))
+            sort_key = (-score, custom_range['range_name'])
+            if best_key is None or sort_key < best_key:
+                best, best_key = custom_range, sort_key
+        return best
+    
+    def _build_adjusted_range(self, test_type: Optional[Tuple], custom_range: Optional[dict],
+                              age: Optional[int], gender: Optional[str]) -> dict:
+        """Combine a test type row and its best custom range into range info"""
         if not test_type:
-            return {
-                'normal_min': None,
-                'normal_max': None,
-                'critical_low': None,
-                'critical_high': None,
-                'source': 'No range found',
-                'age_adjusted': False,
-                'gender_adjusted': False
-            }
+            return _NO_RANGE_FOUND
         
         # Extract base test type values 
         # test_type: (test_type_id, test_name, normal_min, normal_max, unit, description, category, critical_low, critical_high, method)
@@ -644,87 +1202,68 @@ class DatabaseManager:
         
         # If no ranges are configured, return None values
         # User must manually configure all test ranges
-        return {
-            'normal_min': None,
-            'normal_max': None,
-            'critical_low': None,
-            'critical_high': None,
-            'source': 'No range configured - please add via Test Configuration',
-            'age_adjusted': False,
-            'gender_adjusted': False
-        }
+        return _NO_RANGE_CONFIGURED
     
     def add_custom_test_range(self, test_type_id: int, range_name: str, 
                              age_min: int = None, age_max: int = None, 
                              gender: str = None, condition_name: str = None,
                              normal_min: float = None, normal_max: float = None,
                              critical_low: float = None, critical_high: float = None,
-                             notes: str = None) -> bool:
-        """Add a custom test range for specific demographics or conditions"""
+                             notes: str = None) -> Optional[int]:
+        """Add a custom test range for specific demographics or conditions; returns its range_id"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO custom_test_ranges 
-                    (test_type_id, range_name, age_min, age_max, gender, condition_name,
-                     normal_min, normal_max, critical_low, critical_high, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (test_type_id, range_name, age_min, age_max, gender, condition_name,
-                      normal_min, normal_max, critical_low, critical_high, notes))
-                conn.commit()
-                return True
+            with self.transaction():
+                range_id = self._conn.execute(self._stmts['insert_range'],
+                                              (test_type_id, range_name, age_min, age_max, gender,
+                                               condition_name, normal_min, normal_max, critical_low,
+                                               critical_high, notes)).fetchone()[0]
+            self._adjusted_range_cache.clear()
+            return range_id
         except sqlite3.Error:
-            return False
+            return None
     
     def get_custom_test_ranges(self, test_type_id: int = None) -> List[Tuple]:
         """Get custom test ranges, optionally filtered by test type"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            if test_type_id:
-                cursor.execute('''
-                    SELECT ctr.*, tt.test_name 
-                    FROM custom_test_ranges ctr
-                    JOIN test_types tt ON ctr.test_type_id = tt.test_type_id
-                    WHERE ctr.test_type_id = ? AND ctr.is_active = 1
-                    ORDER BY ctr.range_name
-                ''', (test_type_id,))
-            else:
-                cursor.execute('''
-                    SELECT ctr.*, tt.test_name 
-                    FROM custom_test_ranges ctr
-                    JOIN test_types tt ON ctr.test_type_id = tt.test_type_id
-                    WHERE ctr.is_active = 1
-                    ORDER BY tt.test_name, ctr.range_name
-                ''')
-            return cursor.fetchall()
+        if test_type_id:
+            return self._conn.execute(self._stmts['ranges_for_type'], (test_type_id,)).fetchall()
+        return self._conn.execute(self._stmts['all_ranges']).fetchall()
     
     def update_custom_test_range(self, range_id: int, **kwargs) -> bool:
-        """Update a custom test range"""
+        """Update a custom test range
+        
+        Raises:
+            ValueError: If a keyword is not an updatable custom range column
+        """
         if not kwargs:
             return False
-            
-        set_clause = ', '.join([f"{key} = ?" for key in kwargs.keys()])
-        values = list(kwargs.values()) + [range_id]
+        
+        unknown = kwargs.keys() - _RANGE_UPDATE_COLUMNS
+        if unknown:
+            raise ValueError(f"Cannot update custom range column(s): {', '.join(sorted(unknown))}")
+        
+        columns = tuple(sorted(kwargs))
+        sql = self._update_range_sql_cache.get(columns)
+        if sql is None:
+            set_clause = ', '.join([f"{key} = ?" for key in columns])
+            sql = f"UPDATE custom_test_ranges SET {set_clause} WHERE range_id = ?"
+            self._update_range_sql_cache[columns] = sql
+        values = [kwargs[key] for key in columns] + [range_id]
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(f'''
-                    UPDATE custom_test_ranges SET {set_clause} WHERE range_id = ?
-                ''', values)
-                conn.commit()
-                return cursor.rowcount > 0
+            with self.transaction():
+                cursor = self._conn.execute(sql, values)
+            self._adjusted_range_cache.clear()
+            return cursor.rowcount > 0
         except sqlite3.Error:
             return False
     
     def delete_custom_test_range(self, range_id: int) -> bool:
         """Deactivate a custom test range (soft delete)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('UPDATE custom_test_ranges SET is_active = 0 WHERE range_id = ?', (range_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+            with self.transaction():
+                cursor = self._conn.execute(self._stmts['deactivate_range'], (range_id,))
+            self._adjusted_range_cache.clear()
+            return cursor.rowcount > 0
         except sqlite3.Error:
             return False
     
@@ -737,121 +1276,87 @@ class DatabaseManager:
         
         test_type_id = test_type[0]
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Build query based on available patient characteristics
-            conditions = ['ctr.test_type_id = ?', 'ctr.is_active = 1']
-            params = [test_type_id]
-            
-            if age is not None:
-                conditions.append('(ctr.age_min IS NULL OR ctr.age_min <= ?)')
-                conditions.append('(ctr.age_max IS NULL OR ctr.age_max >= ?)')
-                params.extend([age, age])
-            
-            if gender:
-                conditions.append('(ctr.gender IS NULL OR ctr.gender = ?)')
-                params.append(gender)
-            
-            if condition:
-                conditions.append('(ctr.condition_name IS NULL OR ctr.condition_name = ?)')
-                params.append(condition)
-            
-            # Order by specificity (most specific first)
-            order_clause = '''
-                ORDER BY 
-                    (CASE WHEN ctr.condition_name IS NOT NULL THEN 4 ELSE 0 END) +
-                    (CASE WHEN ctr.gender IS NOT NULL THEN 2 ELSE 0 END) +
-                    (CASE WHEN ctr.age_min IS NOT NULL OR ctr.age_max IS NOT NULL THEN 1 ELSE 0 END) DESC,
-                    ctr.range_name
-            '''
-            
-            query = f'''
-                SELECT ctr.*, tt.test_name
-                FROM custom_test_ranges ctr
-                JOIN test_types tt ON ctr.test_type_id = tt.test_type_id
-                WHERE {' AND '.join(conditions)}
-                {order_clause}
-                LIMIT 1
-            '''
-            
-            cursor.execute(query, params)
-            result = cursor.fetchone()
-            
-            if result:
-                # Convert tuple to dictionary
-                columns = ['range_id', 'test_type_id', 'range_name', 'age_min', 'age_max', 
-                          'gender', 'condition_name', 'normal_min', 'normal_max', 
-                          'critical_low', 'critical_high', 'is_active', 'created_date', 
-                          'notes', 'test_name']
-                return dict(zip(columns, result))
-            
-            return None
+        # Filters whose parameter is NULL are skipped inside the statement, so the
+        # SQL text is fixed and the scoring/LIMIT run entirely in SQLite
+        cursor = self._conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        result = cursor.execute(self._stmts['best_range'], {
+            'test_type_id': test_type_id,
+            'age': age,
+            'gender': gender or None,
+            'condition': condition or None,
+        }).fetchone()
+        
+        if result:
+            # sqlite3.Row carries the column names
+            return dict(result)
+        
+        return None
     
     def add_lab_setting(self, setting_name: str, setting_value: str, 
                        setting_type: str = 'text', description: str = None) -> bool:
         """Add or update a lab setting"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO lab_settings 
-                    (setting_name, setting_value, setting_type, description, updated_date)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (setting_name, setting_value, setting_type, description))
-                conn.commit()
+            with self.transaction():
+                self._conn.execute(self._stmts['upsert_setting'],
+                                   (setting_name, setting_value, setting_type, description))
                 return True
         except sqlite3.Error:
             return False
     
     def get_lab_setting(self, setting_name: str) -> Optional[str]:
         """Get a lab setting value"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT setting_value FROM lab_settings WHERE setting_name = ?', (setting_name,))
-            result = cursor.fetchone()
-            return result[0] if result else None
+        result = self._conn.execute(self._stmts['setting_by_name'], (setting_name,)).fetchone()
+        return result[0] if result else None
     
     def get_all_lab_settings(self) -> List[Tuple]:
         """Get all lab settings"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT setting_name, setting_value, setting_type, description, updated_date 
-                FROM lab_settings ORDER BY setting_name
-            ''')
-            return cursor.fetchall()
+        return self._conn.execute(self._stmts['all_settings']).fetchall()
     
     def export_custom_ranges_to_json(self, file_path: str) -> bool:
-        """Export custom test ranges to JSON file"""
+        """Export custom test ranges to JSON file
+        
+        Rows are streamed from the cursor (grouped by test name via the query's
+        ORDER BY) and written range by range, so memory use does not grow with
+        the table. The output is the same 2-space indented layout as json.dump.
+        """
         try:
-            import json
-            
-            ranges_data = {}
-            custom_ranges = self.get_custom_test_ranges()
-            
-            for range_row in custom_ranges:
-                range_id, test_type_id, range_name, age_min, age_max, gender, condition_name, \
-                normal_min, normal_max, critical_low, critical_high, is_active, created_date, notes, test_name = range_row
+            cursor = self._conn.execute(self._stmts['all_ranges'])
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write('{')
+                current_test = None
+                while True:
+                    rows = cursor.fetchmany(1000)
+                    if not rows:
+                        break
+                    for range_row in rows:
+                        range_id, test_type_id, range_name, age_min, age_max, gender, condition_name, \
+                        normal_min, normal_max, critical_low, critical_high, is_active, created_date, notes, test_name = range_row
+                        
+                        if test_name != current_test:
+                            # Close the previous test's list and open a new one
+                            if current_test is not None:
+                                f.write('\n  ],')
+                            f.write(f'\n  {_json_dumps(test_name)}: [\n')
+                            current_test = test_name
+                        else:
+                            f.write(',\n')
+                        
+                        range_json = _json_dumps({
+                            'range_name': range_name,
+                            'age_min': age_min,
+                            'age_max': age_max,
+                            'gender': gender,
+                            'condition_name': condition_name,
+                            'normal_min': normal_min,
+                            'normal_max': normal_max,
+                            'critical_low': critical_low,
+                            'critical_high': critical_high,
+                            'notes': notes
+                        })
+                        f.write('    ' + range_json.replace('\n', '\n    '))
                 
-                if test_name not in ranges_data:
-                    ranges_data[test_name] = []
-                
-                ranges_data[test_name].append({
-                    'range_name': range_name,
-                    'age_min': age_min,
-                    'age_max': age_max,
-                    'gender': gender,
-                    'condition_name': condition_name,
-                    'normal_min': normal_min,
-                    'normal_max': normal_max,
-                    'critical_low': critical_low,
-                    'critical_high': critical_high,
-                    'notes': notes
-                })
-            
-            with open(file_path, 'w') as f:
-                json.dump(ranges_data, f, indent=2, default=str)
+                f.write('\n  ]\n}' if current_test is not None else '}')
             
             return True
         except Exception:
@@ -860,32 +1365,43 @@ class DatabaseManager:
     def import_custom_ranges_from_json(self, file_path: str) -> bool:
         """Import custom test ranges from JSON file"""
         try:
-            import json
+            ranges_data = _json_load(file_path)
             
-            with open(file_path, 'r') as f:
-                ranges_data = json.load(f)
+            # Resolve every test name in one query instead of one lookup per group
+            test_names = list(ranges_data)
+            test_type_ids = {}
+            if test_names:
+                placeholders = ', '.join('?' * len(test_names))
+                test_type_ids = dict(self._conn.execute(
+                    f'SELECT test_name, test_type_id FROM test_types WHERE test_name IN ({placeholders})',
+                    test_names).fetchall())
             
+            range_rows = []
             for test_name, ranges in ranges_data.items():
-                test_type = self.get_test_type_by_name(test_name)
-                if not test_type:
+                test_type_id = test_type_ids.get(test_name)
+                if not test_type_id:
                     continue
                 
-                test_type_id = test_type[0]
-                
                 for range_config in ranges:
-                    self.add_custom_test_range(
-                        test_type_id=test_type_id,
-                        range_name=range_config.get('range_name'),
-                        age_min=range_config.get('age_min'),
-                        age_max=range_config.get('age_max'),
-                        gender=range_config.get('gender'),
-                        condition_name=range_config.get('condition_name'),
-                        normal_min=range_config.get('normal_min'),
-                        normal_max=range_config.get('normal_max'),
-                        critical_low=range_config.get('critical_low'),
-                        critical_high=range_config.get('critical_high'),
-                        notes=range_config.get('notes')
-                    )
+                    if range_config.get('range_name') is None:
+                        continue  # range_name is required; skip as the per-row insert used to
+                    range_rows.append((
+                        test_type_id,
+                        range_config.get('range_name'),
+                        range_config.get('age_min'),
+                        range_config.get('age_max'),
+                        range_config.get('gender'),
+                        range_config.get('condition_name'),
+                        range_config.get('normal_min'),
+                        range_config.get('normal_max'),
+                        range_config.get('critical_low'),
+                        range_config.get('critical_high'),
+                        range_config.get('notes')
+                    ))
+            
+            with self.transaction():
+                self._conn.executemany(self._stmts['bulk_insert_range'], range_rows)
+            self._adjusted_range_cache.clear()
             
             return True
         except Exception:
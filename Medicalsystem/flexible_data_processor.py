@@ -7,9 +7,41 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import re
+import csv
+import io
+import functools
+from operator import itemgetter
 from typing import List, Dict, Tuple, Optional, Any
 from database_manager import DatabaseManager
 
+# Try to import pyarrow for its multi-threaded CSV reader
+try:
+    import pyarrow
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# format='ISO8601' / format='mixed' in pd.to_datetime need pandas 2.0+
+_PANDAS_2 = int(pd.__version__.split('.')[0]) >= 2
+
+# Patient ID cells treated as missing after stripping
+_MISSING_ID_PATTERN = re.compile(r'(?:nan|NaN|)')
+
+# Example values shown per standard field in generate_mapping_template
+_SAMPLE_VALUES = {
+    'patient_id': 'P001',
+    'name': 'John Doe',
+    'age': '45',
+    'gender': 'Male',
+    'phone': '+1-555-0123',
+    'test_name': 'Blood Glucose',
+    'test_value': '95.5',
+    'unit': 'mg/dL',
+    'notes': 'Fasting',
+    'date': '2025-01-15'
+}
+
 class FlexibleDataProcessor:
     def __init__(self, db_manager: DatabaseManager):
         """Initialize flexible data processor with database manager"""
@@ -59,41 +91,95 @@ class FlexibleDataProcessor:
             'biocheq', 'opd/ipd', 'opd', 'ipd', 'unused', 'empty', 'blank'
         ]
         
+        # Lower-cased patterns per field, and pattern -> [(field, position)] for
+        # exact header lookups in detect_column_mapping
+        self._lower_patterns = {field: [pattern.lower() for pattern in patterns]
+                                for field, patterns in self.column_patterns.items()}
+        self._pattern_index = {}
+        for field, patterns in self._lower_patterns.items():
+            for position, pattern in enumerate(patterns):
+                self._pattern_index.setdefault(pattern, []).append((field, position))
+        
+        # Header tuple -> detected mapping; files from the same device repeat headers
+        self._cached_mapping = functools.lru_cache(maxsize=64)(self._mapping_for_columns)
+        
     def detect_column_mapping(self, df: pd.DataFrame) -> Dict[str, str]:
         """
         Intelligently detect column mappings from CSV headers
         Returns a dictionary mapping standard field names to actual column names
         """
+        return dict(self._cached_mapping(tuple(df.columns)))
+    
+    def _mapping_for_columns(self, columns: tuple) -> Tuple[Tuple[str, str], ...]:
+        """Uncached body of detect_column_mapping, as a hashable (field, column) tuple"""
         column_mapping = {}
-        available_columns = [col.lower().strip() for col in df.columns]
-        
-        for standard_field, patterns in self.column_patterns.items():
+        available_columns = [col.lower().strip() for col in columns]
+        
+        # Exact matches: one dict lookup per column. If several patterns of a field
+        # match, the later pattern wins (first column for that pattern)
+        exact_matches = {}
+        for i, col in enumerate(available_columns):
+            for standard_field, position in self._pattern_index.get(col, ()):
+                if standard_field not in exact_matches or position > exact_matches[standard_field][0]:
+                    exact_matches[standard_field] = (position, columns[i])
+        
+        for standard_field, patterns in self._lower_patterns.items():
+            if standard_field in exact_matches:
+                column_mapping[standard_field] = exact_matches[standard_field][1]
+                continue
+            
+            # If no exact match, look for partial matches
             best_match = None
             best_score = 0
-            
-            for pattern in patterns:
-                pattern_lower = pattern.lower()
-                
-                # Look for exact matches first
+            for pattern_lower in patterns:
                 for i, col in enumerate(available_columns):
-                    if col == pattern_lower:
-                        best_match = df.columns[i]
-                        best_score = 100
-                        break
-                
-                # If no exact match, look for partial matches
-                if best_score < 100:
-                    for i, col in enumerate(available_columns):
-                        if pattern_lower in col or col in pattern_lower:
-                            score = len(pattern_lower) / max(len(col), len(pattern_lower)) * 50
-                            if score > best_score:
-                                best_match = df.columns[i]
-                                best_score = score
+                    if pattern_lower in col or col in pattern_lower:
+                        score = len(pattern_lower) / max(len(col), len(pattern_lower)) * 50
+                        if score > best_score:
+                            best_match = columns[i]
+                            best_score = score
             
             if best_match and best_score > 30:  # Minimum confidence threshold
                 column_mapping[standard_field] = best_match
                 
-        return column_mapping
+        return tuple(column_mapping.items())
+    
+    def _read_csv(self, file_path: str, encoding: str) -> pd.DataFrame:
+        """Read a CSV with pyarrow when installed, else pandas' C parser"""
+        if PYARROW_AVAILABLE:
+            try:
+                return self._read_csv_arrow(file_path, encoding)
+            except pyarrow.ArrowInvalid:
+                pass  # Malformed for arrow; let the C parser report it
+        return pd.read_csv(file_path, encoding=encoding)
+    
+    def _read_csv_arrow(self, file_path: str, encoding: str) -> pd.DataFrame:
+        """Read a CSV with pyarrow, keeping pd.read_csv's column types"""
+        read_options = pa_csv.ReadOptions(encoding=encoding)
+        # Empty text cells are missing values, as with pd.read_csv
+        table = pa_csv.read_csv(file_path, read_options=read_options,
+                                convert_options=pa_csv.ConvertOptions(strings_can_be_null=True))
+        
+        # Arrow keeps undecodable text as binary instead of raising
+        if any(pyarrow.types.is_binary(field.type) for field in table.schema):
+            raise UnicodeDecodeError(encoding, b'', 0, 1, 'invalid byte sequence in CSV')
+        
+        # pd.read_csv leaves date/time-like text alone; arrow infers timestamp,
+        # date32 and time types, so re-read just those columns as strings
+        temporal_columns = [field.name for field in table.schema
+                            if pyarrow.types.is_timestamp(field.type)
+                            or pyarrow.types.is_date(field.type)
+                            or pyarrow.types.is_time(field.type)]
+        if temporal_columns:
+            text_table = pa_csv.read_csv(file_path, read_options=read_options,
+                                         convert_options=pa_csv.ConvertOptions(
+                                             include_columns=temporal_columns,
+                                             strings_can_be_null=True,
+                                             column_types={name: pyarrow.string() for name in temporal_columns}))
+            for name in temporal_columns:
+                table = table.set_column(table.schema.get_field_index(name), name, text_table.column(name))
+        
+        return table.to_pandas()
     
     def preview_csv_with_mapping(self, file_path: str, encoding: str = 'utf-8') -> Tuple[bool, str, Optional[pd.DataFrame], Optional[Dict[str, str]]]:
         """
@@ -107,7 +193,7 @@ class FlexibleDataProcessor:
             
             for enc in encodings_to_try:
                 try:
-                    df = pd.read_csv(file_path, encoding=enc)
+                    df = self._read_csv(file_path, enc)
                     break
                 except UnicodeDecodeError:
                     continue
@@ -125,8 +211,9 @@ class FlexibleDataProcessor:
             # Detect column mapping
             column_mapping = self.detect_column_mapping(df)
             
-            # Create a preview with mapped columns - show all data for complete visibility
-            preview_df = df.copy()  # Show all rows instead of limiting to 10
+            # Preview shows all rows; df is freshly read and not shared, so no copy is
+            # needed (callers only read from it - copy before mutating)
+            preview_df = df
             
             # Check if we found essential columns
             essential_fields = ['patient_id', 'test_value']
@@ -155,13 +242,15 @@ class FlexibleDataProcessor:
         
         # Clean and convert data types
         if 'patient_id' in cleaned_df.columns:
-            # Clean patient IDs - remove spaces, convert to string
-            cleaned_df['patient_id'] = cleaned_df['patient_id'].astype(str).str.strip()
-            cleaned_df['patient_id'] = cleaned_df['patient_id'].replace(['nan', 'NaN', ''], np.nan)
+            # Clean patient IDs - remove spaces, convert to string; blanks and
+            # 'nan'/'NaN' placeholders become missing in the same pass
+            patient_ids = cleaned_df['patient_id'].astype('string').str.strip()
+            cleaned_df['patient_id'] = patient_ids.mask(
+                patient_ids.str.fullmatch(_MISSING_ID_PATTERN, na=True), pd.NA)
         
         if 'age' in cleaned_df.columns:
-            # Convert age to numeric, handle various formats
-            cleaned_df['age'] = pd.to_numeric(cleaned_df['age'], errors='coerce')
+            # Convert age to numeric, handle various formats (float32 is exact for ages)
+            cleaned_df['age'] = pd.to_numeric(cleaned_df['age'], errors='coerce', downcast='float')
         
         if 'gender' in cleaned_df.columns:
             # Standardize gender values
@@ -170,8 +259,10 @@ class FlexibleDataProcessor:
                 'f': 'Female', 'female': 'Female', 'woman': 'Female', '2': 'Female',
                 'o': 'Other', 'other': 'Other', 'unknown': 'Other'
             }
-            cleaned_df['gender'] = cleaned_df['gender'].astype(str).str.lower().str.strip()
-            cleaned_df['gender'] = cleaned_df['gender'].map(gender_mapping).fillna('Other')
+            genders = pd.Categorical(cleaned_df['gender'].astype(str).str.lower().str.strip())
+            # Map each distinct value once rather than every row
+            cleaned_df['gender'] = pd.Categorical(
+                genders.map(lambda value: gender_mapping.get(value, 'Other')))
         
         if 'test_value' in cleaned_df.columns:
             # Convert test values to numeric
@@ -200,48 +291,19 @@ class FlexibleDataProcessor:
         """
         Parse dates from various formats commonly found in medical device outputs
         """
-        parsed_dates = pd.Series(index=date_series.index, dtype='datetime64[ns]')
-        
-        # Common date formats from medical devices
-        date_formats = [
-            '%Y-%m-%d',           # 2024-01-15
-            '%d/%m/%Y',           # 15/01/2024
-            '%m/%d/%Y',           # 01/15/2024
-            '%d-%m-%Y',           # 15-01-2024
-            '%Y/%m/%d',           # 2024/01/15
-            '%d.%m.%Y',           # 15.01.2024
-            '%Y-%m-%d %H:%M:%S',  # 2024-01-15 14:30:00
-            '%d/%m/%Y %H:%M',     # 15/01/2024 14:30
-            '%Y-%m-%d %H:%M',     # 2024-01-15 14:30
-            '%d-%b-%Y',           # 15-Jan-2024
-            '%b %d, %Y',          # Jan 15, 2024
-        ]
-        
-        for date_format in date_formats:
+        if _PANDAS_2:
+            # ISO dates first so dayfirst cannot swap month and day in 2024-01-05,
+            # then everything else (15/01/2024, 15-Jan-2024, Jan 15, 2024, ...)
+            parsed_dates = pd.to_datetime(date_series, format='ISO8601', errors='coerce')
             mask = parsed_dates.isna()
-            if not mask.any():
-                break
-                
-            try:
-                parsed_dates[mask] = pd.to_datetime(
-                    date_series[mask], 
-                    format=date_format, 
-                    errors='ignore'
-                )
-            except:
-                continue
-        
-        # If standard formats don't work, try pandas' flexible parser
-        mask = parsed_dates.isna()
-        if mask.any():
-            try:
-                parsed_dates[mask] = pd.to_datetime(date_series[mask], errors='ignore')
-            except:
-                pass
+            if mask.any():
+                parsed_dates[mask] = pd.to_datetime(date_series[mask], format='mixed',
+                                                    dayfirst=True, errors='coerce')
+        else:
+            parsed_dates = pd.to_datetime(date_series, dayfirst=True, errors='coerce')
         
         # For any remaining unparsed dates, use today's date
-        today = datetime.now().strftime('%Y-%m-%d')
-        parsed_dates = parsed_dates.fillna(pd.to_datetime(today))
+        parsed_dates = parsed_dates.fillna(pd.Timestamp(datetime.now().date()))
         
         return parsed_dates
     
@@ -292,7 +354,8 @@ class FlexibleDataProcessor:
         return is_valid, errors, cleaned_df
     
     def import_flexible_csv(self, file_path: str, column_mapping: Dict[str, str], 
-                           encoding: str = 'utf-8', check_duplicates: bool = True) -> Tuple[bool, str, int]:
+                           encoding: str = 'utf-8', check_duplicates: bool = True,
+                           df: Optional[pd.DataFrame] = None) -> Tuple[bool, str, int]:
         """
         Import CSV data with flexible column mapping
         
@@ -301,15 +364,20 @@ class FlexibleDataProcessor:
             column_mapping: Dictionary mapping standard fields to CSV columns
             encoding: File encoding (default: utf-8)
             check_duplicates: Whether to check for and skip duplicate records (default: True)
+            df: Frame already returned by preview_csv_with_mapping for this file;
+                the CSV is only read again when it is not given
             
         Returns: (success, message, imported_rows)
         """
         try:
-            # Read the full CSV file
-            success, message, df, auto_mapping = self.preview_csv_with_mapping(file_path, encoding)
-            
-            if not success:
-                return False, message, 0
+            if df is None:
+                # Read the full CSV file
+                success, message, df, auto_mapping = self.preview_csv_with_mapping(file_path, encoding)
+                
+                if not success:
+                    return False, message, 0
+            else:
+                auto_mapping = self.detect_column_mapping(df) if not column_mapping else None
             
             # Use provided mapping or auto-detected mapping
             final_mapping = column_mapping if column_mapping else auto_mapping
@@ -328,13 +396,44 @@ class FlexibleDataProcessor:
             duplicate_count = 0
             errors = []
             
-            for index, row in final_df.iterrows():
+            # Collect rows first and write them in a single transaction below
+            patient_rows = []
+            test_rows = []
+            accepted_rows = 0
+            
+            # Columns read per row, with the value used when the CSV has no such column
+            import_columns = {
+                'patient_id': None, 'name': '', 'age': None, 'gender': '', 'phone': '',
+                'test_name': None, 'test_value': None, 'date': datetime.now().strftime('%Y-%m-%d'),
+                'unit': '', 'notes': ''
+            }
+            missing_columns = {column: default for column, default in import_columns.items()
+                               if column not in final_df.columns}
+            import_df = final_df.assign(**missing_columns)[list(import_columns)]
+            
+            # Prepare ages and dates per column rather than per row: ages become ints
+            # (None outside 0-150) and dates 'YYYY-MM-DD' strings (blank dates stay missing)
+            ages = pd.to_numeric(import_df['age'], errors='coerce')
+            valid_age = ages.between(0, 150)
+            import_df = import_df.assign(
+                age=np.floor(ages.where(valid_age)).astype('Int64').astype(object).where(valid_age, None))
+            if pd.api.types.is_datetime64_any_dtype(import_df['date']):
+                import_df['date'] = import_df['date'].dt.strftime('%Y-%m-%d')
+            
+            # Resolve every test name up front; unknown ones are created in one batch
+            # with NO preset ranges (user must configure), using the first row's unit
+            has_test = import_df['test_value'].notna() & import_df['test_name'].notna()
+            first_seen = import_df.loc[has_test, ['test_name', 'unit']].drop_duplicates('test_name')
+            new_test_types = [(test_name, f"Imported: {test_name}", unit if pd.notna(unit) else None)
+                              for test_name, unit in first_seen.itertuples(index=False, name=None)
+                              if test_name]
+            test_type_ids = (self.db_manager.ensure_test_types(new_test_types) or {}) if new_test_types else {}
+            
+            for index, (patient_id, full_name, age, gender, phone, test_name, test_value,
+                        test_date, unit, notes) in zip(import_df.index,
+                                                       import_df.itertuples(index=False, name=None)):
                 try:
-                    # Extract patient information
-                    patient_id = row.get('patient_id')
-                    
                     # Handle name field
-                    full_name = row.get('name', '')
                     if full_name:
                         # Split full name into first and last
                         name_parts = full_name.strip().split(' ', 1)
@@ -344,11 +443,6 @@ class FlexibleDataProcessor:
                         first_name = ''
                         last_name = ''
                     
-                    # Get patient details
-                    age = row.get('age')
-                    gender = row.get('gender', '')
-                    phone = row.get('phone', '')
-                    
                     # Fix phone number format if it's numeric
                     if phone and pd.notna(phone):
                         try:
@@ -360,84 +454,44 @@ class FlexibleDataProcessor:
                         except (ValueError, TypeError):
                             phone = str(phone) if phone else ''
                     
-                    # Convert age to integer if available
-                    age_value = None
-                    if pd.notna(age):
-                        try:
-                            age_float = float(age)
-                            if 0 <= age_float <= 150:  # Accept age from 0 to 150 years
-                                age_value = int(age_float)
-                        except (ValueError, TypeError):
-                            # If age conversion fails, keep as None
-                            pass
-                    
-                    # Add or update patient
-                    success = self.db_manager.add_patient(
-                        patient_id=patient_id,
-                        first_name=first_name or None,
-                        last_name=last_name or None,
-                        age=age_value,
-                        gender=gender or None,
-                        phone=phone or None,
-                        email=None,
-                        address=None
-                    )
+                    # Add patient (existing patients are left unchanged)
+                    patient_rows.append((patient_id, first_name or None, last_name or None, age,
+                                         gender or None, phone or None, None, None))
                     
                     # Add test result if we have test data
-                    if pd.notna(row.get('test_value')) and row.get('test_name'):
-                        test_name = row.get('test_name', 'Unknown Test')
-                        test_value = float(row['test_value'])
-                        test_date = row.get('date', datetime.now().strftime('%Y-%m-%d'))
-                        unit = row.get('unit', '')
-                        notes = row.get('notes', '')
+                    if pd.notna(test_value) and test_name:
+                        test_value = float(test_value)
                         
-                        # Convert datetime to string if needed
-                        if isinstance(test_date, pd.Timestamp):
-                            test_date = test_date.strftime('%Y-%m-%d')
+                        if pd.isna(test_date):
+                            errors.append(f"Row {index + 1}: missing test date")
+                            continue
                         
-                        # Auto-create test type with NO preset ranges (user must configure)
-                        test_type = self.db_manager.get_test_type_by_name(test_name)
-                        if test_type:
-                            test_type_id = test_type[0]
-                        else:
-                            # Create test type with NO ranges - user must configure manually
-                            success_test = self.db_manager.add_test_type(
-                                test_name=test_name,
-                                unit=unit,
-                                normal_min=None,  # No preset ranges
-                                normal_max=None,  # No preset ranges
-                                description=f"Imported: {test_name}"
-                            )
-                            if success_test:
-                                test_type = self.db_manager.get_test_type_by_name(test_name)
-                                test_type_id = test_type[0] if test_type else None
-                            else:
-                                test_type_id = None
-                                errors.append(f"Failed to create test type '{test_name}'")
-                                continue
+                        test_type_id = test_type_ids.get(test_name)
+                        if test_type_id is None:
+                            errors.append(f"Failed to create test type '{test_name}'")
+                            continue
                         
-                        if test_type_id:
-                            # Try to add test result
-                            result_added = self.db_manager.add_test_result(
-                                patient_id=patient_id,
-                                test_type_id=test_type_id,
-                                test_value=test_value,
-                                test_date=test_date,
-                                lab_technician=None,
-                                notes=notes,
-                                check_duplicates=check_duplicates
-                            )
-                            
-                            if not result_added and check_duplicates:
-                                duplicate_count += 1
-                                continue
+                        test_rows.append((patient_id, test_type_id, test_value, test_date, None, notes))
                     
-                    imported_count += 1
+                    accepted_rows += 1
                     
                 except Exception as e:
                     errors.append(f"Row {index + 1}: {str(e)}")
                     continue
             
+            # Insert in key order so index pages fill sequentially instead of splitting
+            # at random (stable sorts keep file order among equal keys)
+            patient_rows.sort(key=itemgetter(0))
+            test_rows.sort(key=itemgetter(0, 3))
+            
+            inserted = self.db_manager.bulk_import_rows(patient_rows, test_rows,
+                                                        check_duplicates=check_duplicates)
+            if inserted is None:
+                return False, "Import failed: database error while saving rows", 0
+            
+            duplicate_count = len(test_rows) - inserted
+            imported_count = accepted_rows - duplicate_count
+            
             # Prepare result message
             if imported_count > 0 or duplicate_count > 0:
                 message_parts = [f"Successfully imported {imported_count} rows"]
@@ -460,34 +514,17 @@ class FlexibleDataProcessor:
         except Exception as e:
             return False, f"Import failed: {str(e)}", 0
     
-    def generate_mapping_template(self, detected_columns: List[str]) -> str:
+    def generate_mapping_template(self, detected_columns: Dict[str, str]) -> str:
         """
         Generate a CSV template showing how columns would be mapped
         """
-        template_data = []
-        
-        # Create a sample row showing the mapping
-        template_data.append(["Standard Field", "Detected Column", "Sample Value"])
-        
-        sample_values = {
-            'patient_id': 'P001',
-            'name': 'John Doe',
-            'age': '45',
-            'gender': 'Male',
-            'phone': '+1-555-0123',
-            'test_name': 'Blood Glucose',
-            'test_value': '95.5',
-            'unit': 'mg/dL',
-            'notes': 'Fasting',
-            'date': '2025-01-15'
-        }
+        # Write straight into one buffer; csv quotes values containing commas or quotes
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(["Standard Field", "Detected Column", "Sample Value"])
         
         # Add mappings for each detected field
-        for field, column in detected_columns.items():
-            sample_value = sample_values.get(field, 'N/A')
-            template_data.append([field, column, sample_value])
-        
-        # Convert to CSV format
-        template_text = "\n".join([",".join(row) for row in template_data])
+        writer.writerows((field, column, _SAMPLE_VALUES.get(field, 'N/A'))
+                         for field, column in detected_columns.items())
         
-        return template_text
+        return buffer.getvalue()
@@ -1,1211 +1,1396 @@
-"""
-Report Generator for Medical Test System
-Handles Excel and PDF report generation with color coding and formatting.
-"""
-
-import pandas as pd
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.chart import LineChart, Reference
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.backends.backend_pdf import PdfPages
-from datetime import datetime, timedelta
-import numpy as np
-import os
-from typing import List, Dict, Tuple
-from database_manager import DatabaseManager
-
-class ReportGenerator:
-    def __init__(self, db_manager: DatabaseManager):
-        """Initialize report generator with database manager"""
-        self.db_manager = db_manager
-        
-        # Define color schemes for different test result ranges
-        self.colors = {
-            'normal': PatternFill(start_color='90EE90', end_color='90EE90', fill_type='solid'),  # Light green
-            'high': PatternFill(start_color='FFB6C1', end_color='FFB6C1', fill_type='solid'),    # Light red
-            'low': PatternFill(start_color='87CEEB', end_color='87CEEB', fill_type='solid'),     # Light blue
-            'critical_high': PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid'),  # Red
-            'critical_low': PatternFill(start_color='0000FF', end_color='0000FF', fill_type='solid'),   # Blue
-            'header': PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')   # Light gray
-        }
-        
-        self.fonts = {
-            'header': Font(bold=True, size=12),
-            'normal': Font(size=10),
-            'bold': Font(bold=True, size=10)
-        }
-    
-    def determine_test_status(self, test_value: float, normal_min: float, normal_max: float, 
-                             test_name: str = None, age: int = None, gender: str = None) -> str:
-        """Determine the status of a test result based on age and gender-adjusted normal ranges"""
-        # Get age/gender adjusted ranges if available
-        if test_name:
-            range_info = self.db_manager.get_age_gender_adjusted_range(test_name, age, gender)
-            if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
-                normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
-                # Store range info for potential status message enhancement
-                self._last_range_info = range_info
-        
-        if normal_min is None or normal_max is None:
-            return 'unknown'
-        
-        # Get critical thresholds from range info if available
-        if hasattr(self, '_last_range_info') and self._last_range_info:
-            critical_low = self._last_range_info.get('critical_low')
-            critical_high = self._last_range_info.get('critical_high')
-        else:
-            critical_low = critical_high = None
-        
-        # Convert to float if they exist and are not None
-        try:
-            if critical_low is not None:
-                critical_low = float(critical_low)
-            if critical_high is not None:
-                critical_high = float(critical_high)
-        except (ValueError, TypeError):
-            critical_low = critical_high = None
-        
-        # If no specific critical thresholds, calculate them (30% beyond normal range)
-        if critical_low is None or critical_high is None:
-            range_width = normal_max - normal_min
-            critical_high = normal_max + (range_width * 0.3)
-            critical_low = normal_min - (range_width * 0.3)
-        
-        if test_value >= critical_high:
-            return 'critical_high'
-        elif test_value <= critical_low:
-            return 'critical_low'
-        elif test_value > normal_max:
-            return 'high'
-        elif test_value < normal_min:
-            return 'low'
-        else:
-            return 'normal'
-    
-    def generate_excel_report(self, patient_id: str, output_path: str) -> bool:
-        """Generate a comprehensive Excel report for a patient"""
-        try:
-            # Get patient information
-            patient_info = self.db_manager.get_patient(patient_id)
-            if not patient_info:
-                raise ValueError(f"Patient {patient_id} not found")
-            
-            # Get test results
-            test_results = self.db_manager.get_patient_test_results(patient_id)
-            if not test_results:
-                raise ValueError(f"No test results found for patient {patient_id}")
-            
-            # Create workbook and worksheets
-            wb = openpyxl.Workbook()
-            
-            # Remove default sheet
-            wb.remove(wb.active)
-            
-            # Create patient summary sheet
-            self._create_patient_summary_sheet(wb, patient_info, test_results)
-            
-            # Create detailed results sheet
-            self._create_detailed_results_sheet(wb, test_results)
-            
-            # Create trends sheet if multiple results exist
-            if len(test_results) > 1:
-                self._create_trends_sheet(wb, test_results)
-            
-            # Save workbook with password protection
-            wb.security.workbookPassword = "eipl"
-            wb.security.lockStructure = True
-            
-            # Enable autofilter on all sheets and protect with sorting/filtering allowed
-            for sheet in wb.worksheets:
-                # Enable autofilter for data ranges
-                if sheet.max_row > 1 and sheet.max_column > 1:
-                    sheet.auto_filter.ref = f"A1:{sheet.cell(row=sheet.max_row, column=sheet.max_column).coordinate}"
-                
-                # Protect sheet but allow sorting and filtering
-                sheet.protection.password = "eipl"
-                sheet.protection.sheet = True
-                sheet.protection.sort = True  # Allow sorting
-                sheet.protection.autoFilter = True  # Allow filtering
-                sheet.protection.formatCells = True  # Prevent format changes
-                sheet.protection.formatColumns = True  # Prevent column format changes
-                sheet.protection.formatRows = True  # Prevent row format changes
-                sheet.protection.insertColumns = True  # Prevent inserting columns
-                sheet.protection.insertRows = True  # Prevent inserting rows
-                sheet.protection.insertHyperlinks = True  # Prevent inserting hyperlinks
-                sheet.protection.deleteColumns = True  # Prevent deleting columns
-                sheet.protection.deleteRows = True  # Prevent deleting rows
-                sheet.protection.selectLockedCells = False  # Allow selecting locked cells
-                sheet.protection.selectUnlockedCells = False  # Allow selecting unlocked cells and allow sorting/filtering
-            
-            # Save workbook
-            wb.save(output_path)
-            return True
-            
-        except Exception as e:
-            raise Exception(f"Failed to generate Excel report: {str(e)}")
-    
-    def generate_all_patients_excel_report(self, output_path: str) -> bool:
-        """Generate a comprehensive Excel report for ALL patients with color coding"""
-        try:
-            # Get all patients
-            all_patients = self.db_manager.get_all_patients()
-            if not all_patients:
-                raise ValueError("No patients found in database")
-            
-            # Create workbook
-            wb = openpyxl.Workbook()
-            wb.remove(wb.active)  # Remove default sheet
-            
-            # Create summary sheet for all patients
-            self._create_all_patients_summary_sheet(wb, all_patients)
-            
-            # Create detailed sheet for each patient with test results
-            for patient in all_patients:
-                patient_id = patient[0]
-                test_results = self.db_manager.get_patient_test_results(patient_id)
-                if test_results:  # Only create sheet if patient has test results
-                    self._create_patient_detail_sheet(wb, patient, test_results)
-            
-            # Create overview statistics sheet
-            self._create_statistics_overview_sheet(wb, all_patients)
-            
-            # Save workbook with password protection
-            wb.security.workbookPassword = "eipl"
-            wb.security.lockStructure = True
-            
-            # Enable autofilter on all sheets and protect with sorting/filtering allowed
-            for sheet in wb.worksheets:
-                # Enable autofilter for data ranges
-                if sheet.max_row > 1 and sheet.max_column > 1:
-                    sheet.auto_filter.ref = f"A1:{sheet.cell(row=sheet.max_row, column=sheet.max_column).coordinate}"
-                
-                # Protect sheet but allow sorting and filtering
-                sheet.protection.password = "eipl"
-                sheet.protection.sheet = True
-                sheet.protection.sort = True  # Allow sorting
-                sheet.protection.autoFilter = True  # Allow filtering
-                sheet.protection.formatCells = True  # Prevent format changes
-                sheet.protection.formatColumns = True  # Prevent column format changes
-                sheet.protection.formatRows = True  # Prevent row format changes
-                sheet.protection.insertColumns = True  # Prevent inserting columns
-                sheet.protection.insertRows = True  # Prevent inserting rows
-                sheet.protection.insertHyperlinks = True  # Prevent inserting hyperlinks
-                sheet.protection.deleteColumns = True  # Prevent deleting columns
-                sheet.protection.deleteRows = True  # Prevent deleting rows
-                sheet.protection.selectLockedCells = False  # Allow selecting locked cells
-                sheet.protection.selectUnlockedCells = False  # Allow selecting unlocked cells
-            
-            # Save workbook
-            wb.save(output_path)
-            return True
-            
-        except Exception as e:
-            raise Exception(f"Failed to generate all patients Excel report: {str(e)}")
-            
-    def _create_all_patients_summary_sheet(self, workbook, all_patients):
-        """Create summary sheet for all patients with color-coded test results"""
-        ws = workbook.create_sheet("All Patients Summary", 0)
-        
-        # Title
-        ws['A1'] = "MEDICAL TEST RESULTS - ALL PATIENTS"
-        ws['A1'].font = Font(bold=True, size=16)
-        ws.merge_cells('A1:L1')
-        
-        # Headers
-        headers = ['Patient ID', 'Name', 'Age(Years)', 'Gender', 'Test Name', 'Test Value',
-                   'Unit', 'Biological Reference', 'Status', 'Test Date', 'Lab Technician', 'Notes']
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=3, column=col, value=header)
-            cell.font = self.fonts['header']
-            cell.fill = self.colors['header']
-            
-        # Add border to headers
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'), 
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        current_row = 4
-        
-        # Process each patient
-        for patient in all_patients:
-            # Handle different patient tuple lengths due to database schema evolution
-            patient_id = patient[0]
-            first_name = patient[1] if len(patient) > 1 else None
-            last_name = patient[2] if len(patient) > 2 else None
-            gender = patient[4] if len(patient) > 4 else None
-            phone = patient[5] if len(patient) > 5 else None
-            email = patient[6] if len(patient) > 6 else None
-            address = patient[7] if len(patient) > 7 else None
-            created_date = patient[8] if len(patient) > 8 else None
-            age = patient[9] if len(patient) > 9 else None  # Age is at position 9
-            
-            # Format age display
-            age_display = f"{age}" if age else "___"
-            
-            # Get patient's test results
-            test_results = self.db_manager.get_patient_test_results(patient_id)
-            
-            if not test_results:
-                # Patient with no test results
-                # Format name properly - remove None values
-                name_parts = []
-                if first_name:
-                    name_parts.append(first_name)
-                if last_name:
-                    name_parts.append(last_name)
-                patient_name = " ".join(name_parts) if name_parts else "_____"
-                
-                if phone:
-                    patient_name += f" (Phone: {phone})"
-                ws.cell(row=current_row, column=1, value=patient_id)
-                ws.cell(row=current_row, column=2, value=patient_name)
-                ws.cell(row=current_row, column=3, value=age_display)
-                ws.cell(row=current_row, column=4, value=gender or '___')
-                ws.cell(row=current_row, column=5, value="No test results")
-                current_row += 1
-            else:
-                # Patient with test results
-                for result in test_results:
-                    result_id, _, test_name, test_value, normal_min, normal_max, unit, test_date, lab_tech, notes = result
-                    
-                    # Get age/gender adjusted ranges
-                    range_info = self.db_manager.get_age_gender_adjusted_range(test_name, age, gender)
-                    if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
-                        normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
-                    
-                    # Determine status and color
-                    status = self.determine_test_status(test_value, normal_min, normal_max, test_name, age, gender)
-                    color = self._get_status_color(status)
-                    
-                    # Format normal range
-                    if normal_min is not None and normal_max is not None:
-                        normal_range = f"{normal_min:.2f} - {normal_max:.2f}"
-                    else:
-                        normal_range = "Not defined"
-                    
-                    # Format name properly - remove None values
-                    name_parts = []
-                    if first_name:
-                        name_parts.append(first_name)
-                    if last_name:
-                        name_parts.append(last_name)
-                    patient_name = " ".join(name_parts) if name_parts else "_____"
-                    
-                    if phone:
-                        patient_name += f" (Phone: {phone})"
-                    
-                    # Add data to row
-                    row_data = [
-                        patient_id,
-                        patient_name,
-                        age_display,
-                        gender or '___',
-                        test_name,
-                        f"{test_value:.2f}",
-                        unit or '',
-                        normal_range,
-                        status.replace('_', ' ').title(),
-                        test_date,
-                        lab_tech or '',
-                        notes or ''
-                    ]
-                    
-                    for col, value in enumerate(row_data, 1):
-                        cell = ws.cell(row=current_row, column=col, value=value)
-                        cell.border = thin_border
-                        
-                        # Apply color coding to test value and status columns
-                        if col in [6, 9]:  # Test Value and Status columns
-                            cell.fill = color
-                            if color == self.colors['critical_high'] or color == self.colors['critical_low']:
-                                cell.font = Font(color='FFFFFF', bold=True)  # White text for dark backgrounds
-                    
-                    current_row += 1
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = None
-            for cell in column:
-                try:
-                    # Skip merged cells
-                    if hasattr(cell, 'column_letter'):
-                        if column_letter is None:
-                            column_letter = cell.column_letter
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                except:
-                    pass
-            
-            if column_letter:
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-    def _create_patient_detail_sheet(self, workbook, patient, test_results):
-        """Create detailed sheet for individual patient"""
-        patient_id, first_name, last_name, date_of_birth, gender, phone, email, address, created_date, age = patient
-        sheet_name = f"{patient_id}_{(first_name or '_____')[:8]}"[:31]  # Excel sheet name limit
-        
-        ws = workbook.create_sheet(sheet_name)
-        
-        # Format name properly - remove None values
-        name_parts = []
-        if first_name:
-            name_parts.append(first_name)
-        if last_name:
-            name_parts.append(last_name)
-        patient_name_with_phone = " ".join(name_parts) if name_parts else "_____"
-        
-        if phone:
-            patient_name_with_phone += f" (Phone: {phone})"
-        
-        # Patient info header
-        ws['A1'] = f"PATIENT DETAILS: {patient_name_with_phone} (ID: {patient_id})"
-        ws['A1'].font = Font(bold=True, size=14)
-        ws.merge_cells('A1:H1')
-        
-        # Patient information
-        ws['A3'] = "Patient Information:"
-        ws['A3'].font = self.fonts['header']
-        
-        info_data = [
-            f"Age: {age if age else '___'} years",
-            f"Gender: {gender or '___'}",
-            f"Phone: {phone or 'Not provided'}",
-            f"Email: {email or 'Not provided'}"
-        ]
-        
-        for i, info in enumerate(info_data):
-            ws[f'A{4+i}'] = info
-        
-        # Test results header
-        ws['A10'] = "Test Results:"
-        ws['A10'].font = self.fonts['header']
-        
-        # Test results table headers
-        headers = ['Test Name', 'Value', 'Unit', 'Biological Reference', 'Status', 'Date', 'Lab Tech', 'Notes']
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=11, column=col, value=header)
-            cell.font = self.fonts['header']
-            cell.fill = self.colors['header']
-        
-        # Add test results with color coding
-        for i, result in enumerate(test_results, 12):
-            result_id, _, test_name, test_value, normal_min, normal_max, unit, test_date, lab_tech, notes = result
-            
-            # Get age/gender adjusted ranges
-            range_info = self.db_manager.get_age_gender_adjusted_range(test_name, age, gender)
-            if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
-                normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
-            
-            # Determine status and color
-            status = self.determine_test_status(test_value, normal_min, normal_max, test_name, age, gender)
-            color = self._get_status_color(status)
-            
-            # Format normal range
-            if normal_min is not None and normal_max is not None:
-                normal_range = f"{normal_min:.2f} - {normal_max:.2f}"
-            else:
-                normal_range = "Not defined"
-            
-            # Add row data
-            row_data = [
-                test_name,
-                f"{test_value:.2f}",
-                unit or '',
-                normal_range,
-                status.replace('_', ' ').title(),
-                test_date,
-                lab_tech or '',
-                notes or ''
-            ]
-            
-            for col, value in enumerate(row_data, 1):
-                cell = ws.cell(row=i, column=col, value=value)
-                
-                # Apply color coding to value and status columns
-                if col in [2, 5]:  # Value and Status columns
-                    cell.fill = color
-                    if color == self.colors['critical_high'] or color == self.colors['critical_low']:
-                        cell.font = Font(color='FFFFFF', bold=True)
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = None
-            for cell in column:
-                try:
-                    # Skip merged cells
-                    if hasattr(cell, 'column_letter'):
-                        if column_letter is None:
-                            column_letter = cell.column_letter
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                except:
-                    pass
-            
-            if column_letter:
-                adjusted_width = min(max_length + 2, 30)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-    def _create_statistics_overview_sheet(self, workbook, all_patients):
-        """Create statistics overview sheet"""
-        ws = workbook.create_sheet("Statistics Overview")
-        
-        # Title
-        ws['A1'] = "MEDICAL TEST STATISTICS OVERVIEW"
-        ws['A1'].font = Font(bold=True, size=16)
-        ws.merge_cells('A1:E1')
-        
-        # Basic statistics
-        total_patients = len(all_patients)
-        patients_with_tests = 0
-        total_test_results = 0
-        abnormal_results = 0
-        
-        # Count statistics
-        for patient in all_patients:
-            patient_id = patient[0]
-            test_results = self.db_manager.get_patient_test_results(patient_id)
-            if test_results:
-                patients_with_tests += 1
-                total_test_results += len(test_results)
-                
-                # Count abnormal results
-                for result in test_results:
-                    _, _, test_name, test_value, normal_min, normal_max, _, _, _, _ = result
-                    age = patient[9] if len(patient) > 9 and patient[9] is not None else None
-                    gender = patient[4]
-                    
-                    status = self.determine_test_status(test_value, normal_min, normal_max, test_name, age, gender)
-                    if status != 'normal':
-                        abnormal_results += 1
-        
-        # Statistics display
-        stats_data = [
-            ("Total Patients:", total_patients),
-            ("Patients with Test Results:", patients_with_tests),
-            ("Total Test Results:", total_test_results),
-            ("Normal Results:", total_test_results - abnormal_results),
-            ("Abnormal Results:", abnormal_results),
-            ("Abnormal Percentage:", f"{(abnormal_results/total_test_results*100):.2f}%" if total_test_results > 0 else "0%")
-        ]
-        
-        ws['A3'] = "Overall Statistics:"
-        ws['A3'].font = self.fonts['header']
-        
-        for i, (label, value) in enumerate(stats_data):
-            ws[f'A{4+i}'] = label
-            ws[f'B{4+i}'] = value
-            ws[f'A{4+i}'].font = self.fonts['bold']
-            
-    def _get_status_color(self, status: str):
-        """Get the appropriate color for a test status"""
-        status_colors = {
-            'normal': self.colors['normal'],
-            'high': self.colors['high'],
-            'low': self.colors['low'],
-            'critical_high': self.colors['critical_high'],
-            'critical_low': self.colors['critical_low'],
-            'severely_high': self.colors['critical_high'],
-            'severely_low': self.colors['critical_low']
-        }
-        return status_colors.get(status, self.colors['normal'])
-    
-    def _create_patient_summary_sheet(self, workbook, patient_info, test_results):
-        """Create patient summary worksheet"""
-        ws = workbook.create_sheet("Patient Summary")
-        
-        # Calculate patient age - use position 9 for age field
-        age = patient_info[9] if len(patient_info) > 9 and patient_info[9] is not None else None
-        gender = patient_info[4] if patient_info[4] else None
-        
-        # Patient Information Section
-        ws['A1'] = "MEDICAL TEST REPORT"
-        ws['A1'].font = Font(bold=True, size=16)
-        ws.merge_cells('A1:E1')
-        
-        ws['A3'] = "Patient Information"
-        ws['A3'].font = self.fonts['header']
-        ws['A3'].fill = self.colors['header']
-        
-        # Patient details with age
-        age_display = f"{age} years" if age is not None else "___"
-        gender_display = gender if gender else "___"
-        
-        # Format name properly - remove None values
-        name_parts = []
-        if patient_info[1]:  # first_name
-            name_parts.append(patient_info[1])
-        if patient_info[2]:  # last_name
-            name_parts.append(patient_info[2])
-        patient_name = " ".join(name_parts) if name_parts else "_____"
-        
-        patient_details = [
-            ("Patient ID:", patient_info[0]),
-            ("Name:", patient_name),
-            ("Date of Birth:", patient_info[3] if patient_info[3] else "Not provided"),
-            ("Age:", age_display),
-            ("Gender:", gender_display),
-            ("Phone:", patient_info[5] if patient_info[5] else "Not provided"),
-            ("Email:", patient_info[6] if patient_info[6] else "Not provided")
-        ]
-        
-        for i, (label, value) in enumerate(patient_details):
-            ws[f'A{4+i}'] = label
-            ws[f'B{4+i}'] = value
-            ws[f'A{4+i}'].font = self.fonts['bold']
-        
-        # Latest Test Results Summary with age/gender adjustments
-        latest_results = self._get_latest_test_results(test_results)
-        
-        # Add note about age/gender adjustments
-        adjustment_note = ""
-        if age is None and gender is None:
-            adjustment_note = " (Using general adult ranges - no age/gender info)"
-        elif age is None:
-            adjustment_note = f" (Using gender-adjusted ranges for {gender} - no age info)"
-        elif gender is None:
-            adjustment_note = f" (Using age-adjusted ranges for {age} years - no gender info)"
-        else:
-            adjustment_note = f" (Age/gender adjusted for {age}-year-old {gender})"
-        
-        ws['A13'] = f"Latest Test Results{adjustment_note}"
-        ws['A13'].font = self.fonts['header']
-        ws['A13'].fill = self.colors['header']
-        
-        # Headers for results table
-        headers = ['Test Name', 'Value', 'Unit', 'Biological Reference', 'Status', 'Range Source', 'Date']
-        for i, header in enumerate(headers):
-            cell = ws[f'{chr(65+i)}14']
-            cell.value = header
-            cell.font = self.fonts['header']
-            cell.fill = self.colors['header']
-        
-        # Add latest results with age/gender adjustments
-        for i, result in enumerate(latest_results):
-            row = 15 + i
-            test_name, test_value, normal_min, normal_max, unit, test_date = result
-            
-            # Get age/gender adjusted ranges
-            range_info = self.db_manager.get_age_gender_adjusted_range(test_name, age, gender)
-            if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
-                normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
-            
-            ws[f'A{row}'] = test_name
-            ws[f'B{row}'] = test_value
-            ws[f'C{row}'] = unit if unit else ''
-            
-            if normal_min is not None and normal_max is not None:
-                ws[f'D{row}'] = f"{normal_min} - {normal_max}"
-                status = self.determine_test_status(test_value, normal_min, normal_max, test_name, age, gender)
-                ws[f'E{row}'] = status.replace('_', ' ').title()
-                
-                # Apply color coding
-                status_cell = ws[f'E{row}']
-                if status in self.colors:
-                    status_cell.fill = self.colors[status]
-                
-                # Add range source information
-                ws[f'F{row}'] = range_info.get('source', 'Base range')
-            else:
-                ws[f'D{row}'] = "Not defined"
-                ws[f'E{row}'] = "Unknown"
-                ws[f'F{row}'] = "No range available"
-            
-            ws[f'G{row}'] = test_date
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = None
-            for cell in column:
-                try:
-                    # Skip merged cells
-                    if hasattr(cell, 'column_letter'):
-                        if column_letter is None:
-                            column_letter = cell.column_letter
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                except:
-                    pass
-            
-            if column_letter:
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-    
-    def _create_detailed_results_sheet(self, workbook, test_results):
-        """Create detailed results worksheet"""
-        ws = workbook.create_sheet("Detailed Results")
-        
-        # Get patient info for age/gender calculations
-        if test_results:
-            patient_id = test_results[0][1]  # Get patient_id from first result
-            patient_info = self.db_manager.get_patient(patient_id)
-            age = patient_info[9] if patient_info and len(patient_info) > 9 and patient_info[9] is not None else None
-            gender = patient_info[4] if patient_info and patient_info[4] else None
-        else:
-            age, gender = None, None
-        
-        # Convert test results to DataFrame for easier manipulation
-        df_data = []
-        for result in test_results:
-            result_id, patient_id, test_name, test_value, normal_min, normal_max, unit, test_date, lab_tech, notes = result
-            
-            # Get age/gender adjusted ranges
-            range_info = self.db_manager.get_age_gender_adjusted_range(test_name, age, gender)
-            if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
-                normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
-            
-            df_data.append({
-                'Result ID': result_id,
-                'Test Name': test_name,
-                'Value': test_value,
-                'Unit': unit if unit else '',
-                'Normal Min': normal_min if normal_min is not None else '',
-                'Normal Max': normal_max if normal_max is not None else '',
-                'Test Date': test_date,
-                'Lab Technician': lab_tech if lab_tech else '',
-                'Notes': notes if notes else ''
-            })
-        
-        df = pd.DataFrame(df_data)
-        
-        # Add headers
-        for r in dataframe_to_rows(df, index=False, header=True):
-            ws.append(r)
-        
-        # Format headers
-        for cell in ws[1]:
-            cell.font = self.fonts['header']
-            cell.fill = self.colors['header']
-        
-        # Apply color coding to test values with age/gender adjustments
-        for row in range(2, len(df) + 2):
-            test_value = ws[f'C{row}'].value
-            normal_min = ws[f'E{row}'].value
-            normal_max = ws[f'F{row}'].value
-            test_name = ws[f'B{row}'].value
-            
-            if normal_min and normal_max and isinstance(test_value, (int, float)):
-                try:
-                    status = self.determine_test_status(float(test_value), float(normal_min), float(normal_max), 
-                                                      test_name, age, gender)
-                    if status in self.colors:
-                        ws[f'C{row}'].fill = self.colors[status]
-                except:
-                    pass
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = None
-            for cell in column:
-                try:
-                    # Skip merged cells
-                    if hasattr(cell, 'column_letter'):
-                        if column_letter is None:
-                            column_letter = cell.column_letter
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                except:
-                    pass
-            
-            if column_letter:
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-    
-    def _create_trends_sheet(self, workbook, test_results):
-        """Create trends analysis worksheet with charts"""
-        ws = workbook.create_sheet("Trends Analysis")
-        
-        # Group results by test type
-        test_groups = {}
-        for result in test_results:
-            test_name = result[2]
-            if test_name not in test_groups:
-                test_groups[test_name] = []
-            test_groups[test_name].append(result)
-        
-        # Create trend data for tests with multiple results
-        trend_data = []
-        for test_name, results in test_groups.items():
-            if len(results) > 1:
-                # Sort by date
-                sorted_results = sorted(results, key=lambda x: x[7])  # Sort by test_date
-                for result in sorted_results:
-                    trend_data.append({
-                        'Test Name': test_name,
-                        'Date': result[7],
-                        'Value': result[3],
-                        'Normal Min': result[4] if result[4] is not None else '',
-                        'Normal Max': result[5] if result[5] is not None else ''
-                    })
-        
-        if trend_data:
-            df = pd.DataFrame(trend_data)
-            
-            # Add data to worksheet
-            for r in dataframe_to_rows(df, index=False, header=True):
-                ws.append(r)
-            
-            # Format headers
-            for cell in ws[1]:
-                cell.font = self.fonts['header']
-                cell.fill = self.colors['header']
-        else:
-            ws['A1'] = "No trend data available (requires multiple test results of the same type)"
-            ws['A1'].font = self.fonts['header']
-    
-    def _get_latest_test_results(self, test_results):
-        """Get the latest result for each test type"""
-        latest_results = {}
-        
-        for result in test_results:
-            test_name = result[2]
-            test_date = result[7]
-            
-            if test_name not in latest_results or test_date > latest_results[test_name][5]:
-                latest_results[test_name] = (
-                    test_name,           # 0: test_name
-                    result[3],           # 1: test_value
-                    result[4],           # 2: normal_min
-                    result[5],           # 3: normal_max
-                    result[6],           # 4: unit
-                    test_date            # 5: test_date
-                )
-        
-        return list(latest_results.values())
-    
-    def generate_patient_summary(self, patient_id: str, output_path: str) -> bool:
-        """Generate a prescription-style patient test report (PDF)"""
-        try:
-            import matplotlib.pyplot as plt
-            from matplotlib.backends.backend_pdf import PdfPages
-            import matplotlib.patches as patches
-            
-            # Get patient and test data
-            patient_info = self.db_manager.get_patient(patient_id)
-            if not patient_info:
-                raise ValueError(f"Patient {patient_id} not found")
-            
-            test_results = self.db_manager.get_patient_test_results_with_method(patient_id)
-            if not test_results:
-                raise ValueError(f"No test results found for patient {patient_id}")
-            
-            with PdfPages(output_path) as pdf:
-                # Create prescription-style report
-                fig, ax = plt.subplots(1, 1, figsize=(8.5, 11))
-                ax.axis('off')
-                
-                # Current Y position for text placement
-                y_pos = 0.95
-                
-                # 1. HEADER SECTION - Clean medical report header
-                # Hospital name with larger, bold formatting
-                ax.text(0.5, y_pos, 'HITECH MEDICAL COLLEGE & HOSPITAL', 
-                       fontsize=20, fontweight='bold', ha='center', transform=ax.transAxes)
-                y_pos -= 0.04
-                
-                # Address with professional spacing
-                ax.text(0.5, y_pos, 'Hi-Tech Hospital Road, Pandra, Rasulgarh, Bhubaneswar, Odisha 751025', 
-                       fontsize=11, ha='center', transform=ax.transAxes)
-                y_pos -= 0.03
-                
-                # Simple phone number
-                ax.text(0.5, y_pos, 'Number: 0674 350 0900', 
-                       fontsize=9, ha='center', transform=ax.transAxes)
-                y_pos -= 0.06
-                
-                # 2. DEPARTMENT SECTION with better formatting
-                ax.text(0.5, y_pos, 'DEPARTMENT OF BIOCHEMISTRY', 
-                       fontsize=14, fontweight='bold', ha='center', transform=ax.transAxes)
-                y_pos -= 0.05
-                
-                # 3. PATIENT INFORMATION SECTION - Simple clean layout
-                # Create a simple box around patient info  
-                box_height = 0.15
-                box_width = 0.9
-                box_x = 0.05
-                box_y = y_pos - box_height
-                
-                # Draw simple single border
-                rect = patches.Rectangle((box_x, box_y), box_width, box_height, 
-                                        linewidth=1, edgecolor='black', facecolor='none',
-                                        transform=ax.transAxes)
-                ax.add_patch(rect)
-                
-                # Add "PATIENT INFORMATION" label at top of box
-                ax.text(0.5, y_pos - 0.02, 'PATIENT INFORMATION', fontsize=11, fontweight='bold', 
-                       ha='center', transform=ax.transAxes)
-                
-                # Get age - use position 9 for age field
-                age = patient_info[9] if len(patient_info) > 9 and patient_info[9] is not None else "___"
-                
-                # Extract timestamp information from patient records
-                processed_test_data = self._process_test_results_for_display(test_results)
-                formatted_timestamp = self._extract_and_format_date(processed_test_data)
-                
-                # Patient info inside the box with better spacing
-                info_y = y_pos - 0.05
-                
-                # Format name properly - remove None values
-                name_parts = []
-                if patient_info[1]:  # first_name
-                    name_parts.append(patient_info[1])
-                if patient_info[2]:  # last_name
-                    name_parts.append(patient_info[2])
-                patient_name_with_phone = " ".join(name_parts) if name_parts else "_____"
-                
-                if patient_info[5]:  # phone is at index 5
-                    patient_name_with_phone += f' (Ph: {patient_info[5]})'
-                
-                # Row 1: Patient Name spanning wider, ID on right
-                ax.text(0.07, info_y, 'Patient Name:', fontsize=11, fontweight='bold', transform=ax.transAxes)
-                ax.text(0.23, info_y, f'{patient_name_with_phone}', fontsize=11, transform=ax.transAxes)
-                ax.text(0.70, info_y, 'Patient ID:', fontsize=10, fontweight='bold', transform=ax.transAxes)
-                ax.text(0.82, info_y, f'{patient_id}', fontsize=10, transform=ax.transAxes)
-                info_y -= 0.035
-                
-                # Row 2: Date on left, Ref by on right
-                ax.text(0.07, info_y, 'Received & Reported Date:', fontsize=10, fontweight='bold', transform=ax.transAxes)
-                ax.text(0.38, info_y, f'{formatted_timestamp}', fontsize=10, transform=ax.transAxes)
-                ax.text(0.70, info_y, 'Ref by:', fontsize=10, fontweight='bold', transform=ax.transAxes)
-                ax.text(0.78, info_y, 'HITECH', fontsize=10, transform=ax.transAxes)
-                info_y -= 0.035
-                
-                # Row 3: Age/Sex on left, Specimen on right  
-                ax.text(0.07, info_y, 'Age/Sex:', fontsize=10, fontweight='bold', transform=ax.transAxes)
-                ax.text(0.18, info_y, f'{age}/{patient_info[4] if patient_info[4] else "___"}', fontsize=10, transform=ax.transAxes)
-                ax.text(0.70, info_y, 'Specimen:', fontsize=10, fontweight='bold', transform=ax.transAxes)
-                ax.text(0.82, info_y, 'Blood', fontsize=10, transform=ax.transAxes)
-                
-                y_pos = box_y - 0.06
-                
-                # 4. TEST RESULTS SECTION - Simple line-by-line format
-                # Add section title
-                ax.text(0.5, y_pos, 'LABORATORY TEST RESULTS', fontsize=12, fontweight='bold', 
-                       ha='center', transform=ax.transAxes)
-                y_pos -= 0.04
-                
-                # Column headers (no table borders)
-                col_positions = [0.07, 0.30, 0.55, 0.80]
-                headers = ['Parameter', 'Result Value', 'Biological Reference', 'Method']
-                
-                for i, header in enumerate(headers):
-                    ax.text(col_positions[i], y_pos, header, fontsize=11, fontweight='bold', 
-                           transform=ax.transAxes)
-                
-                y_pos -= 0.03
-                
-                # Get latest test results and display only tests the patient has taken
-                display_ready_results = self._prepare_results_for_display(processed_test_data)
-                
-                for test_record in display_ready_results:
-                    test_name = test_record['test_name']
-                    test_value = test_record['test_value'] 
-                    normal_min, normal_max = test_record['normal_range']
-                    unit = test_record['unit']
-                    test_date = test_record['timestamp']
-                    method = test_record['method']
-                    
-                    # Get age/gender adjusted ranges
-                    age_num = patient_info[9] if patient_info and len(patient_info) > 9 and patient_info[9] is not None else None
-                    gender = patient_info[4] if patient_info[4] else None
-                    range_info = self.db_manager.get_age_gender_adjusted_range(test_name, age_num, gender)
-                    
-                    if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
-                        normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
-                    
-                    # Determine if result is abnormal
-                    is_abnormal = False
-                    if normal_min is not None and normal_max is not None:
-                        status = self.determine_test_status(test_value, normal_min, normal_max, test_name, age_num, gender)
-                        is_abnormal = status != 'normal'
-                    
-                    # Format values with units
-                    unit_text = f" {unit}" if unit else ""
-                    result_text = f"{test_value:.2f}{unit_text}"
-                    
-                    # Format normal range
-                    if normal_min is not None and normal_max is not None:
-                        normal_text = f"{normal_min:.2f}-{normal_max:.2f}{unit_text}"
-                    else:
-                        normal_text = "N/A"
-                    
-                    # Method text
-                    method_text = method if method else "Standard Method"
-                    
-                    # Display row data
-                    row_data = [test_name, result_text, normal_text, method_text]
-                    
-                    for i, data in enumerate(row_data):
-                        # Special formatting for abnormal result values (column 1)
-                        if i == 1 and is_abnormal:
-                            # For abnormal values: bold, italic, underlined
-                            ax.text(col_positions[i], y_pos, data, fontsize=9, fontweight='bold', 
-                                   fontstyle='italic', transform=ax.transAxes)
-                            # Add underline manually
-                            text_width = len(data) * 0.006
-                            ax.plot([col_positions[i], col_positions[i] + text_width], 
-                                   [y_pos - 0.005, y_pos - 0.005], 'k-', linewidth=0.5, transform=ax.transAxes)
-                        else:
-                            ax.text(col_positions[i], y_pos, data, fontsize=9, transform=ax.transAxes)
-                    
-                    y_pos -= 0.025
-                
-                # 5. FOOTER SECTION
-                # Move to bottom of page for footer
-                footer_y = 0.15
-                
-                # Clinical correlation and disclaimer messages
-                ax.text(0.05, footer_y, 'Suggested Clinical correlation *if yes please discuss', 
-                       fontsize=10, transform=ax.transAxes)
-                footer_y -= 0.03
-                
-                ax.text(0.05, footer_y, 'Test items relate only to the item tested', 
-                       fontsize=10, transform=ax.transAxes)
-                footer_y -= 0.03
-                
-                ax.text(0.05, footer_y, 'No part of the report can reproduced without permission of the admin', 
-                       fontsize=10, transform=ax.transAxes)
-                footer_y -= 0.04
-                
-                # End of report marker
-                ax.text(0.5, footer_y, '**THIS IS A SYSTEM GENERATED REPORT**', 
-                       fontsize=12, fontweight='bold', ha='center', transform=ax.transAxes)
-                
-                plt.tight_layout()
-                pdf.savefig(fig, bbox_inches='tight')
-                plt.close()
-            
-            return True
-            
-        except Exception as e:
-            raise Exception(f"Failed to generate patient summary: {str(e)}")
-    
-    def _create_summary_chart(self, ax, test_results):
-        """Create a summary chart for the PDF report"""
-        ax.set_title('Test Results Timeline', fontweight='bold')
-        
-        # Group by test type and get recent results
-        test_groups = {}
-        for result in test_results:
-            test_name = result[2]
-            if test_name not in test_groups:
-                test_groups[test_name] = []
-            test_groups[test_name].append((result[7], result[3]))  # date, value
-        
-        colors = plt.cm.Set3(np.linspace(0, 1, len(test_groups)))
-        
-        for i, (test_name, results) in enumerate(list(test_groups.items())[:5]):  # Show top 5 tests
-            if len(results) > 1:
-                dates = [datetime.strptime(r[0], '%Y-%m-%d') for r in sorted(results)]
-                values = [r[1] for r in sorted(results)]
-                ax.plot(dates, values, marker='o', label=test_name[:15], color=colors[i])
-        
-        ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=8)
-        ax.set_xlabel('Date')
-        ax.set_ylabel('Test Values')
-        ax.grid(True, alpha=0.3)
-        
-        # Format x-axis dates
-        if len(test_groups) > 0:
-            ax.tick_params(axis='x', rotation=45)
-    
-    def _create_abnormal_results_summary(self, ax, latest_results, patient_info=None):
-        """Create abnormal results summary for PDF"""
-        ax.set_title('Abnormal Results Alert (Age/Gender Adjusted)', fontweight='bold')
-        ax.axis('off')
-        
-        # Get age and gender for adjustments
-        age = None
-        gender = None
-        if patient_info:
-            age = patient_info[9] if len(patient_info) > 9 and patient_info[9] is not None else None
-            gender = patient_info[4] if patient_info[4] else None
-        
-        abnormal_count = {'high': 0, 'low': 0, 'critical_high': 0, 'critical_low': 0}
-        abnormal_details = []
-        
-        for result in latest_results:
-            test_name, test_value, normal_min, normal_max, unit, test_date = result
-            
-            # Get age/gender adjusted ranges
-            range_info = self.db_manager.get_age_gender_adjusted_range(test_name, age, gender)
-            if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
-                normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
-            
-            if normal_min is not None and normal_max is not None:
-                status = self.determine_test_status(test_value, normal_min, normal_max, test_name, age, gender)
-                if status != 'normal':
-                    abnormal_count[status] += 1
-                    abnormal_details.append(f"{test_name}: {test_value} {unit or ''} ({status.replace('_', ' ').title()})")
-        
-        if any(abnormal_count.values()):
-            alert_text = "⚠️ ABNORMAL RESULTS DETECTED ⚠️\n\n"
-            alert_text += f"Critical High: {abnormal_count['critical_high']}\n"
-            alert_text += f"High: {abnormal_count['high']}\n"
-            alert_text += f"Low: {abnormal_count['low']}\n"
-            alert_text += f"Critical Low: {abnormal_count['critical_low']}\n\n"
-            alert_text += "Details (Age/Gender Adjusted):\n" + "\n".join(abnormal_details[:5])
-        else:
-            alert_text = "✅ All test results within normal ranges\n(Age/Gender Adjusted)"
-        
-        ax.text(0.1, 0.9, alert_text, transform=ax.transAxes, fontsize=9, 
-                verticalalignment='top', fontfamily='monospace')
-    
-    def generate_test_statistics_report(self, output_path: str) -> bool:
-        """Generate a system-wide statistics report"""
-        try:
-            # Get database statistics
-            stats = self.db_manager.get_database_stats()
-            
-            # Create workbook
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "System Statistics"
-            
-            # Add title
-            ws['A1'] = "Medical Test System Statistics"
-            ws['A1'].font = Font(bold=True, size=16)
-            ws.merge_cells('A1:C1')
-            
-            # Add statistics
-            stats_data = [
-                ("Total Patients:", stats['patients']),
-                ("Total Test Results:", stats['test_results']),
-                ("Available Test Types:", stats['test_types']),
-                ("Report Generated:", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            ]
-            
-            for i, (label, value) in enumerate(stats_data):
-                ws[f'A{3+i}'] = label
-                ws[f'B{3+i}'] = value
-                ws[f'A{3+i}'].font = self.fonts['bold']
-            
-            # Save workbook with password protection
-            wb.security.workbookPassword = "eipl"
-            wb.security.lockStructure = True
-            
-            # Enable autofilter and protect sheet with sorting/filtering allowed
-            if ws.max_row > 1 and ws.max_column > 1:
-                ws.auto_filter.ref = f"A1:{ws.cell(row=ws.max_row, column=ws.max_column).coordinate}"
-            
-            # Protect sheet but allow sorting and filtering
-            ws.protection.password = "eipl"
-            ws.protection.sheet = True
-            ws.protection.sort = False  # Allow sorting
-            ws.protection.autoFilter = False  # Allow filtering
-            ws.protection.formatCells = True  # Prevent format changes
-            ws.protection.selectLockedCells = False  # Allow selecting locked cells
-            ws.protection.selectUnlockedCells = False  # Allow selecting unlocked cells
-            
-            wb.save(output_path)
-            return True
-            
-        except Exception as e:
-            raise Exception(f"Failed to generate statistics report: {str(e)}")
-    
-    def _process_test_results_for_display(self, test_data):
-        """Process raw test results data into display-ready format"""
-        processed_data = []
-        for record in test_data:
-            # Extract relevant test information
-            if len(record) >= 11:  # Complete record with method
-                display_record = {
-                    'test_name': record[2],
-                    'test_value': record[3], 
-                    'normal_range': (record[4], record[5]),
-                    'unit': record[6],
-                    'timestamp': record[7],
-                    'method': record[10]
-                }
-            else:  # Legacy record format
-                display_record = {
-                    'test_name': record[2],
-                    'test_value': record[3],
-                    'normal_range': (record[4], record[5]), 
-                    'unit': record[6],
-                    'timestamp': record[7],
-                    'method': "Standard Method"
-                }
-            processed_data.append(display_record)
-        return processed_data
-    
-    def _prepare_results_for_display(self, processed_records):
-        """Prepare processed test records for final display output"""
-        # Group by test type to get only the latest result for each test
-        test_groups = {}
-        
-        for record in processed_records:
-            test_type = record['test_name']
-            record_date = record['timestamp']
-            
-            if test_type not in test_groups or record_date > test_groups[test_type]['timestamp']:
-                test_groups[test_type] = record
-                
-        return list(test_groups.values())
-    
-    def _extract_and_format_date(self, processed_records):
-        """Extract most recent timestamp and format for display"""
-        if not processed_records:
-            return "N/A"
-        
-        # Collect all valid timestamps
-        valid_timestamps = [rec['timestamp'] for rec in processed_records if rec['timestamp']]
-        
-        if not valid_timestamps:
-            return "N/A"
-            
-        # Find the latest timestamp
-        latest_timestamp = max(valid_timestamps)
-        
-        # Format for display
-        try:
-            from datetime import datetime
-            if isinstance(latest_timestamp, str):
-                date_obj = datetime.strptime(latest_timestamp, '%Y-%m-%d')
-            else:
-                date_obj = latest_timestamp
-            return date_obj.strftime("%d/%m/%Y")
-        except:
-            return str(latest_timestamp)  # Fallback to string representation
-    
-    def _get_latest_test_results_with_method(self, test_results):
-        """
-        Convert test results to include method information.
-        Expected format: (test_name, test_value, normal_min, normal_max, unit, test_date, method)
-        """
-        formatted_results = []
-        
-        for result in test_results:
-            # Extract data from the result tuple
-            # Format: (test_result_id, patient_id, test_name, test_value, normal_min, normal_max, unit, test_date, lab_tech, notes, method)
-            if len(result) >= 11:  # New format with method
-                test_name = result[2]
-                test_value = result[3]
-                normal_min = result[4]
-                normal_max = result[5]
-                unit = result[6]
-                test_date = result[7]
-                method = result[10]
-            else:  # Old format without method
-                test_name = result[2]
-                test_value = result[3]
-                normal_min = result[4]
-                normal_max = result[5]
-                unit = result[6]
-                test_date = result[7]
-                method = "Standard Method"  # Default method
-            
-            formatted_results.append((test_name, test_value, normal_min, normal_max, unit, test_date, method))
-        
-        return formatted_results
+"""
+Report Generator for Medical Test System
+Handles Excel and PDF report generation with color coding and formatting.
+"""
+
+import pandas as pd
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+from openpyxl.utils import get_column_letter
+from openpyxl.chart import LineChart, Reference
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+import matplotlib.patches as patches
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.collections import LineCollection
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import TextToPath
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+import math
+import numpy as np
+import os
+import re
+from typing import List, Dict, Tuple
+from database_manager import DatabaseManager
+
+# xlsxwriter is optional; when installed it can write the all-patients workbook instead of openpyxl
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+# Display label for each test status
+_STATUS_DISPLAY = {
+    'normal': 'Normal',
+    'high': 'High',
+    'low': 'Low',
+    'critical_high': 'Critical High',
+    'critical_low': 'Critical Low',
+    'severely_high': 'Severely High',
+    'severely_low': 'Severely Low',
+    'unknown': 'Unknown'
+}
+
+# Characters Excel does not allow in sheet titles, and its title length limit
+_INVALID_SHEET_CHARS = re.compile(r'[\\/*?:\[\]]')
+_MAX_SHEET_TITLE = 31
+
+# PDF page size and the axes margin tight_layout used to settle on (its 1.08-font padding), in inches
+_PDF_PAGE_SIZE = (8.5, 11)
+_PDF_MARGIN = 0.15
+_PDF_AXES_RECT = (_PDF_MARGIN / _PDF_PAGE_SIZE[0], _PDF_MARGIN / _PDF_PAGE_SIZE[1],
+                  1 - 2 * _PDF_MARGIN / _PDF_PAGE_SIZE[0], 1 - 2 * _PDF_MARGIN / _PDF_PAGE_SIZE[1])
+
+# Font of abnormal PDF result values, used to measure their underline
+_ABNORMAL_VALUE_FONT = FontProperties(size=9, weight='bold', style='italic')
+_TEXT_TO_PATH = TextToPath()
+
+# Shared styles, built once at import instead of per sheet or per cell
+_THIN_SIDE = Side(style='thin')
+_THIN_BORDER = Border(left=_THIN_SIDE, right=_THIN_SIDE, top=_THIN_SIDE, bottom=_THIN_SIDE)
+_TITLE_FONT = Font(bold=True, size=16)
+_SECTION_FONT_14 = Font(bold=True, size=14)
+
+def _as_float(value) -> float:
+    """Scalar counterpart of the float conversion in classify_test_statuses (NaN when missing)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+@lru_cache(maxsize=2048)
+def _critical_bounds(normal_min: float, normal_max: float,
+                     critical_low: float, critical_high: float) -> Tuple[float, float]:
+    """Critical (low, high) for a range; 30% beyond the normal range when either is missing"""
+    if math.isnan(critical_low) or math.isnan(critical_high):
+        range_width = normal_max - normal_min
+        return normal_min - range_width * 0.3, normal_max + range_width * 0.3
+    return critical_low, critical_high
+
+
+@lru_cache(maxsize=4096)
+def _format_value(value: float, unit_text: str) -> str:
+    """PDF result cell text; the same value/unit pairs recur across reports"""
+    return f"{value:.2f}{unit_text}"
+
+
+@lru_cache(maxsize=4096)
+def _format_range(normal_min: float, normal_max: float, unit_text: str) -> str:
+    """PDF reference range cell text"""
+    return f"{normal_min:.2f}-{normal_max:.2f}{unit_text}"
+
+
+@lru_cache(maxsize=1024)
+def _display_date(timestamp: str) -> str:
+    """A 'YYYY-MM-DD' test date as the PDF's DD/MM/YYYY; unparseable strings pass through"""
+    try:
+        return datetime.strptime(timestamp, '%Y-%m-%d').strftime("%d/%m/%Y")
+    except ValueError:
+        return timestamp
+
+
+@lru_cache(maxsize=1024)
+def _abnormal_value_width(text: str) -> float:
+    """Width of an abnormal PDF result value as a fraction of the page axes width"""
+    width, _, _ = _TEXT_TO_PATH.get_text_width_height_descent(text, _ABNORMAL_VALUE_FONT, ismath=False)
+    return width / 72 / (_PDF_PAGE_SIZE[0] * _PDF_AXES_RECT[2])
+
+
+# (test_name, test_value, normal_min, normal_max, unit, test_date[, method]) out of a result row
+_RESULT_WITH_METHOD = itemgetter(2, 3, 4, 5, 6, 7, 10)
+_RESULT_WITHOUT_METHOD = itemgetter(2, 3, 4, 5, 6, 7)
+
+
+# A cell value plus the openpyxl styles it is written with, by either engine
+_StyledValue = namedtuple('_StyledValue', 'value font fill border')
+
+
+class _XlsxWriterWorkbook:
+    """Just enough of a workbook for the all-patients sheet builders to write through xlsxwriter"""
+    
+    def __init__(self, output_path: str):
+        self.book = xlsxwriter.Workbook(output_path)
+        self.worksheets = []
+        self._formats = {}
+    
+    def create_sheet(self, title: str, index: int = None):
+        """Add a worksheet; titles are already unique (see _unique_sheet_name)"""
+        if index is not None and index != len(self.worksheets):
+            raise ValueError("xlsxwriter sheets can only be added in order")
+        sheet = self.book.add_worksheet(title)
+        self.worksheets.append(sheet)
+        return sheet
+    
+    def cell_format(self, value: _StyledValue):
+        """Shared xlsxwriter format for one combination of openpyxl styles"""
+        key = (value.font, value.fill, value.border)
+        cell_format = self._formats.get(key)
+        if cell_format is None:
+            props = {}
+            if value.font is not None:
+                props['bold'] = bool(value.font.b)
+                if value.font.sz:
+                    props['font_size'] = value.font.sz
+                if value.font.color is not None:
+                    props['font_color'] = '#' + value.font.color.rgb[-6:]
+            if value.fill is not None:
+                props['pattern'] = 1
+                props['bg_color'] = '#' + value.fill.fgColor.rgb[-6:]
+            if value.border is not None:
+                props['border'] = 1
+            cell_format = self._formats[key] = self.book.add_format(props)
+        return cell_format
+    
+    def write_rows(self, ws, rows, title_span: int, widths: List[float], max_col: int):
+        """Write finished rows to one sheet, with its title merge and autofilter"""
+        for col, width in enumerate(widths):
+            ws.set_column(col, col, width)
+        
+        for row_index, row in enumerate(rows):
+            for col, value in enumerate(row):
+                if isinstance(value, _StyledValue):
+                    ws.write(row_index, col, value.value, self.cell_format(value))
+                elif value is not None:
+                    ws.write(row_index, col, value)
+        
+        title = rows[0][0]
+        ws.merge_range(0, 0, 0, title_span - 1, title.value, self.cell_format(title))
+        if len(rows) > 1 and max_col > 1:
+            ws.autofilter(0, 0, len(rows) - 1, max_col - 1)
+
+
+class ReportGenerator:
+    # Color schemes for different test result ranges; openpyxl styles are
+    # immutable values, so every instance and workbook shares these
+    colors = {
+        'normal': PatternFill(start_color='90EE90', end_color='90EE90', fill_type='solid'),  # Light green
+        'high': PatternFill(start_color='FFB6C1', end_color='FFB6C1', fill_type='solid'),    # Light red
+        'low': PatternFill(start_color='87CEEB', end_color='87CEEB', fill_type='solid'),     # Light blue
+        'critical_high': PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid'),  # Red
+        'critical_low': PatternFill(start_color='0000FF', end_color='0000FF', fill_type='solid'),   # Blue
+        'header': PatternFill(start_color='D3D3D3', end_color='D3D3D3', fill_type='solid')   # Light gray
+    }
+    
+    fonts = {
+        'header': Font(bold=True, size=12),
+        'normal': Font(size=10),
+        'bold': Font(bold=True, size=10),
+        'critical': Font(color='FFFFFF', bold=True)  # White text for dark backgrounds
+    }
+    
+    # Fill for each test status; severely high/low share the critical fills
+    _STATUS_COLORS = {
+        'normal': colors['normal'],
+        'high': colors['high'],
+        'low': colors['low'],
+        'critical_high': colors['critical_high'],
+        'critical_low': colors['critical_low'],
+        'severely_high': colors['critical_high'],
+        'severely_low': colors['critical_low']
+    }
+    
+    # Fills whose cells get the white critical font
+    _CRITICAL_COLORS = frozenset((colors['critical_high'], colors['critical_low']))
+    
+    def __init__(self, db_manager: DatabaseManager):
+        """Initialize report generator with database manager"""
+        self.db_manager = db_manager
+        self._report_fig = None
+    
+    def _pdf_page_figure(self) -> Figure:
+        """The PDF page figure, created once and cleared for each report"""
+        if self._report_fig is None:
+            # A standalone Figure stays out of pyplot's global figure registry
+            self._report_fig = Figure(figsize=_PDF_PAGE_SIZE)
+        else:
+            self._report_fig.clear()
+        return self._report_fig
+    
+    def determine_test_status(self, test_value: float, normal_min: float, normal_max: float,
+                             critical_low: float = None, critical_high: float = None) -> str:
+        """Determine the status of a test result against its (age/gender adjusted) range
+        
+        Same rules as classify_test_statuses, without building arrays for one value.
+        """
+        normal_min, normal_max = _as_float(normal_min), _as_float(normal_max)
+        if math.isnan(normal_min) or math.isnan(normal_max):
+            return 'unknown'
+        
+        critical_low, critical_high = _critical_bounds(normal_min, normal_max,
+                                                       _as_float(critical_low), _as_float(critical_high))
+        test_value = _as_float(test_value)
+        if test_value >= critical_high:
+            return 'critical_high'
+        if test_value <= critical_low:
+            return 'critical_low'
+        if test_value > normal_max:
+            return 'high'
+        if test_value < normal_min:
+            return 'low'
+        return 'normal'
+    
+    @staticmethod
+    def classify_test_statuses(test_values, normal_min, normal_max, critical_low, critical_high) -> List[str]:
+        """Classify many test values at once against per-row ranges
+        
+        Missing critical thresholds fall back to 30% beyond the normal range;
+        rows without a normal range are 'unknown'.
+        """
+        def as_floats(values):
+            try:
+                return np.array(values, dtype=float)
+            except (ValueError, TypeError):
+                return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float)
+        
+        values = as_floats(test_values)
+        normal_min, normal_max = as_floats(normal_min), as_floats(normal_max)
+        critical_low, critical_high = as_floats(critical_low), as_floats(critical_high)
+        
+        # If no specific critical thresholds, calculate them (30% beyond normal range)
+        no_critical = np.isnan(critical_low) | np.isnan(critical_high)
+        range_width = normal_max - normal_min
+        critical_high = np.where(no_critical, normal_max + range_width * 0.3, critical_high)
+        critical_low = np.where(no_critical, normal_min - range_width * 0.3, critical_low)
+        
+        statuses = np.select(
+            [np.isnan(normal_min) | np.isnan(normal_max),
+             values >= critical_high, values <= critical_low,
+             values > normal_max, values < normal_min],
+            ['unknown', 'critical_high', 'critical_low', 'high', 'low'],
+            default='normal')
+        return statuses.tolist()
+    
+    def _classify_with_ranges(self, test_results, ranges) -> List[Tuple]:
+        """Adjusted (normal_min, normal_max, status) per result row, given its
+        adjusted (normal_min, normal_max, critical_low, critical_high)"""
+        normal_mins, normal_maxes, critical_lows, critical_highs = [], [], [], []
+        for result, (normal_min, normal_max, critical_low, critical_high) in zip(test_results, ranges):
+            if normal_min is not None and normal_max is not None:
+                normal_mins.append(normal_min)
+                normal_maxes.append(normal_max)
+                critical_lows.append(critical_low)
+                critical_highs.append(critical_high)
+            else:
+                normal_mins.append(result[4])
+                normal_maxes.append(result[5])
+                critical_lows.append(None)
+                critical_highs.append(None)
+        
+        statuses = self.classify_test_statuses([result[3] for result in test_results],
+                                               normal_mins, normal_maxes, critical_lows, critical_highs)
+        return list(zip(normal_mins, normal_maxes, statuses))
+    
+    def _adjusted_ranges(self, test_names, age, gender) -> Dict[str, dict]:
+        """Look up the adjusted range of each distinct test name once for one patient"""
+        names = list(dict.fromkeys(test_names))
+        ranges = self.db_manager.get_age_gender_adjusted_range_batch([(name, age, gender) for name in names])
+        return dict(zip(names, ranges))
+    
+    def _classified_results_by_patient(self) -> Dict[str, List[Tuple]]:
+        """Every patient's (result, (normal_min, normal_max, status)) pairs from one query"""
+        rows = self.db_manager.get_results_with_ranges()
+        classified = self._classify_with_ranges(rows, [row[10:14] for row in rows])
+        
+        results_by_patient = {}
+        for row, row_status in zip(rows, classified):
+            results_by_patient.setdefault(row[1], []).append((row[:10], row_status))
+        return results_by_patient
+    
+    def generate_excel_report(self, patient_id: str, output_path: str) -> bool:
+        """Generate a comprehensive Excel report for a patient"""
+        try:
+            # Get patient information
+            patient_info = self.db_manager.get_patient(patient_id)
+            if not patient_info:
+                raise ValueError(f"Patient {patient_id} not found")
+            
+            # Get test results
+            test_results = self.db_manager.get_patient_test_results(patient_id)
+            if not test_results:
+                raise ValueError(f"No test results found for patient {patient_id}")
+            
+            # Create workbook and worksheets
+            wb = openpyxl.Workbook()
+            
+            # Remove default sheet
+            wb.remove(wb.active)
+            
+            # Create patient summary sheet
+            self._create_patient_summary_sheet(wb, patient_info, test_results)
+            
+            # Create detailed results sheet
+            self._create_detailed_results_sheet(wb, patient_info, test_results)
+            
+            # Create trends sheet if multiple results exist
+            if len(test_results) > 1:
+                self._create_trends_sheet(wb, test_results)
+            
+            # Save workbook with password protection
+            wb.security.workbookPassword = "eipl"
+            wb.security.lockStructure = True
+            
+            # Enable autofilter on all sheets and protect with sorting/filtering allowed
+            for sheet in wb.worksheets:
+                # Enable autofilter for data ranges
+                if sheet.max_row > 1 and sheet.max_column > 1:
+                    sheet.auto_filter.ref = f"A1:{sheet.cell(row=sheet.max_row, column=sheet.max_column).coordinate}"
+                
+                # Protect sheet but allow sorting and filtering
+                sheet.protection.password = "eipl"
+                sheet.protection.sheet = True
+                sheet.protection.sort = True  # Allow sorting
+                sheet.protection.autoFilter = True  # Allow filtering
+                sheet.protection.formatCells = True  # Prevent format changes
+                sheet.protection.formatColumns = True  # Prevent column format changes
+                sheet.protection.formatRows = True  # Prevent row format changes
+                sheet.protection.insertColumns = True  # Prevent inserting columns
+                sheet.protection.insertRows = True  # Prevent inserting rows
+                sheet.protection.insertHyperlinks = True  # Prevent inserting hyperlinks
+                sheet.protection.deleteColumns = True  # Prevent deleting columns
+                sheet.protection.deleteRows = True  # Prevent deleting rows
+                sheet.protection.selectLockedCells = False  # Allow selecting locked cells
+                sheet.protection.selectUnlockedCells = False  # Allow selecting unlocked cells and allow sorting/filtering
+            
+            # Save workbook
+            wb.save(output_path)
+            return True
+            
+        except Exception as e:
+            raise Exception(f"Failed to generate Excel report: {str(e)}")
+    
+    def generate_all_patients_excel_report(self, output_path: str, engine: str = 'openpyxl') -> bool:
+        """Generate a comprehensive Excel report for ALL patients with color coding
+        
+        engine='xlsxwriter' writes the same sheets through xlsxwriter when it is
+        installed; xlsxwriter protects each sheet but cannot lock the workbook structure.
+        """
+        try:
+            # Get all patients
+            all_patients = self.db_manager.get_all_patients()
+            if not all_patients:
+                raise ValueError("No patients found in database")
+            
+            if engine == 'xlsxwriter':
+                if not XLSXWRITER_AVAILABLE:
+                    raise ImportError("xlsxwriter is not installed")
+                wb = _XlsxWriterWorkbook(output_path)
+            else:
+                # Create a write-only workbook; every sheet is streamed row by row
+                wb = openpyxl.Workbook(write_only=True)
+            
+            # Fetch and classify every result against its adjusted range once
+            results_by_patient = self._classified_results_by_patient()
+            
+            # Create summary sheet for all patients; its rows are gathered in the pass below
+            summary_ws, summary_rows = self._create_all_patients_summary_sheet(wb)
+            
+            # One pass over the patients fills the summary rows, the detail sheets and the statistics
+            used_sheet_names = {"All Patients Summary", "Statistics Overview"}
+            patients_with_tests = 0
+            status_counts = Counter()  # Filled by the summary rows as they are built
+            for patient in all_patients:
+                classified_results = results_by_patient.get(patient[0])
+                summary_rows.extend(self._all_patients_summary_rows(patient, classified_results, status_counts))
+                if classified_results:  # Only create sheet if patient has test results
+                    self._create_patient_detail_sheet(wb, patient, classified_results, used_sheet_names)
+                    patients_with_tests += 1
+            
+            # Auto-adjust summary column widths while streaming its rows out
+            self._write_sheet_rows(wb, summary_ws, summary_rows, len(summary_rows[2]), max_width=50)  # Title spans the header row
+            
+            # Create overview statistics sheet
+            self._create_statistics_overview_sheet(wb, len(all_patients), patients_with_tests, status_counts)
+            
+            if engine == 'xlsxwriter':
+                # xlsxwriter's default protection allows only selecting cells, like the openpyxl settings below
+                for sheet in wb.worksheets:
+                    sheet.protect("eipl")
+                wb.book.close()
+                return True
+            
+            # Save workbook with password protection
+            wb.security.workbookPassword = "eipl"
+            wb.security.lockStructure = True
+            
+            # Protect every sheet with sorting/filtering allowed (autofilters are set as each sheet is written)
+            for sheet in wb.worksheets:
+                sheet.protection.password = "eipl"
+                sheet.protection.sheet = True
+                sheet.protection.sort = True  # Allow sorting
+                sheet.protection.autoFilter = True  # Allow filtering
+                sheet.protection.formatCells = True  # Prevent format changes
+                sheet.protection.formatColumns = True  # Prevent column format changes
+                sheet.protection.formatRows = True  # Prevent row format changes
+                sheet.protection.insertColumns = True  # Prevent inserting columns
+                sheet.protection.insertRows = True  # Prevent inserting rows
+                sheet.protection.insertHyperlinks = True  # Prevent inserting hyperlinks
+                sheet.protection.deleteColumns = True  # Prevent deleting columns
+                sheet.protection.deleteRows = True  # Prevent deleting rows
+                sheet.protection.selectLockedCells = False  # Allow selecting locked cells
+                sheet.protection.selectUnlockedCells = False  # Allow selecting unlocked cells
+            
+            # Save workbook
+            wb.save(output_path)
+            return True
+        
+        except Exception as e:
+            raise Exception(f"Failed to generate all patients Excel report: {str(e)}")
+    
+    @staticmethod
+    def _styled_cell(value, font=None, fill=None, border=None):
+        """Pair a value with the styles to write it with"""
+        return _StyledValue(value, font, fill, border)
+    
+    @staticmethod
+    def _write_only_cell(ws, value):
+        """Turn a styled value into a write-only cell carrying its styles"""
+        if not isinstance(value, _StyledValue):
+            return value
+        cell = WriteOnlyCell(ws, value=value.value)
+        if value.font is not None:
+            cell.font = value.font
+        if value.fill is not None:
+            cell.fill = value.fill
+        if value.border is not None:
+            cell.border = value.border
+        return cell
+    
+    @staticmethod
+    def _track_column_lengths(max_lengths: List[int], row):
+        """Fold one written row into the running longest-value length of each column"""
+        if len(row) > len(max_lengths):
+            max_lengths.extend([0] * (len(row) - len(max_lengths)))
+        for col, value in enumerate(row):
+            if isinstance(value, _StyledValue):
+                value = value.value
+            if value and len(str(value)) > max_lengths[col]:
+                max_lengths[col] = len(str(value))
+    
+    @staticmethod
+    def _set_column_widths(ws, max_lengths: List[int], max_width: int):
+        """Auto-fit column widths from tracked value lengths"""
+        for col, max_length in enumerate(max_lengths, 1):
+            ws.column_dimensions[get_column_letter(col)].width = min(max_length + 2, max_width)
+    
+    def _write_sheet_rows(self, workbook, ws, rows, title_span: int, max_width: int = None):
+        """Stream rows into a write-only sheet: merge the title across title_span columns,
+        size columns to their longest value when max_width is given, and set the autofilter"""
+        max_col = max([title_span] + [len(row) for row in rows])
+        max_lengths = []
+        if max_width is not None:
+            # Column widths must be set before the first row is written
+            max_lengths = [0] * title_span
+            for row in rows:
+                self._track_column_lengths(max_lengths, row)
+        
+        if isinstance(workbook, _XlsxWriterWorkbook):
+            widths = [min(max_length + 2, max_width) for max_length in max_lengths]
+            workbook.write_rows(ws, rows, title_span, widths, max_col)
+            return
+        
+        self._set_column_widths(ws, max_lengths, max_width)
+        for row in rows:
+            ws.append([self._write_only_cell(ws, value) for value in row])
+        
+        ws.merged_cells.add(f"A1:{get_column_letter(title_span)}1")
+        if len(rows) > 1 and max_col > 1:
+            ws.auto_filter.ref = f"A1:{get_column_letter(max_col)}{len(rows)}"
+    
+    def _create_all_patients_summary_sheet(self, workbook):
+        """Create the all-patients summary sheet and return it with its title and header rows"""
+        ws = workbook.create_sheet("All Patients Summary", 0)
+        
+        # Title
+        rows = [[self._styled_cell("MEDICAL TEST RESULTS - ALL PATIENTS", font=_TITLE_FONT)], []]
+        
+        # Headers
+        headers = ['Patient ID', 'Name', 'Age(Years)', 'Gender', 'Test Name', 'Test Value',
+                   'Unit', 'Biological Reference', 'Status', 'Test Date', 'Lab Technician', 'Notes']
+        rows.append([self._styled_cell(header, font=self.fonts['header'], fill=self.colors['header'])
+                     for header in headers])
+        return ws, rows
+        
+    def _all_patients_summary_rows(self, patient, classified_results, status_counts: Counter):
+        """Build one patient's color-coded rows for the all-patients summary sheet,
+        counting each row's status into status_counts"""
+        rows = []
+        thin_border = _THIN_BORDER
+        
+        # Handle different patient tuple lengths due to database schema evolution
+        patient_id = patient[0]
+        first_name = patient[1] if len(patient) > 1 else None
+        last_name = patient[2] if len(patient) > 2 else None
+        gender = patient[4] if len(patient) > 4 else None
+        phone = patient[5] if len(patient) > 5 else None
+        email = patient[6] if len(patient) > 6 else None
+        address = patient[7] if len(patient) > 7 else None
+        created_date = patient[8] if len(patient) > 8 else None
+        age = patient[9] if len(patient) > 9 else None  # Age is at position 9
+        
+        # Format age display
+        age_display = f"{age}" if age else "___"
+        
+        if not classified_results:
+            # Patient with no test results
+            # Format name properly - remove None values
+            name_parts = []
+            if first_name:
+                name_parts.append(first_name)
+            if last_name:
+                name_parts.append(last_name)
+            patient_name = " ".join(name_parts) if name_parts else "_____"
+            
+            if phone:
+                patient_name += f" (Phone: {phone})"
+            rows.append([patient_id, patient_name, age_display, gender or '___', "No test results"])
+        else:
+            # Patient with test results
+            for result, (normal_min, normal_max, status) in classified_results:
+                result_id, _, test_name, test_value, _, _, unit, test_date, lab_tech, notes = result
+                color = self._get_status_color(status)
+                status_counts[status] += 1
+                
+                # Format normal range
+                if normal_min is not None and normal_max is not None:
+                    normal_range = f"{normal_min:.2f} - {normal_max:.2f}"
+                else:
+                    normal_range = "Not defined"
+                
+                # Format name properly - remove None values
+                name_parts = []
+                if first_name:
+                    name_parts.append(first_name)
+                if last_name:
+                    name_parts.append(last_name)
+                patient_name = " ".join(name_parts) if name_parts else "_____"
+                
+                if phone:
+                    patient_name += f" (Phone: {phone})"
+                
+                # Add data to row
+                row_data = [
+                    patient_id,
+                    patient_name,
+                    age_display,
+                    gender or '___',
+                    test_name,
+                    f"{test_value:.2f}",
+                    unit or '',
+                    normal_range,
+                    _STATUS_DISPLAY[status],
+                    test_date,
+                    lab_tech or '',
+                    notes or ''
+                ]
+                
+                row = []
+                for col, value in enumerate(row_data, 1):
+                    # Apply color coding to test value and status columns
+                    if col in [6, 9]:  # Test Value and Status columns
+                        font = self.fonts['critical'] if color in self._CRITICAL_COLORS else None
+                        row.append(self._styled_cell(value, font=font, fill=color, border=thin_border))
+                    else:
+                        row.append(self._styled_cell(value, border=thin_border))
+                rows.append(row)
+        return rows
+            
+    def _create_patient_detail_sheet(self, workbook, patient, classified_results, used_sheet_names: set):
+        """Create detailed sheet for individual patient"""
+        patient_id, first_name, last_name, date_of_birth, gender, phone, email, address, created_date, age = patient
+        sheet_name = self._unique_sheet_name(f"{patient_id}_{(first_name or '_____')[:8]}", used_sheet_names)
+        
+        ws = workbook.create_sheet(sheet_name)
+        
+        # Format name properly - remove None values
+        name_parts = []
+        if first_name:
+            name_parts.append(first_name)
+        if last_name:
+            name_parts.append(last_name)
+        patient_name_with_phone = " ".join(name_parts) if name_parts else "_____"
+        
+        if phone:
+            patient_name_with_phone += f" (Phone: {phone})"
+        
+        # Patient info header
+        rows = [
+            [self._styled_cell(f"PATIENT DETAILS: {patient_name_with_phone} (ID: {patient_id})",
+                               font=_SECTION_FONT_14)],
+            [],
+        ]
+        
+        # Patient information
+        rows.append([self._styled_cell("Patient Information:", font=self.fonts['header'])])
+        
+        info_data = [
+            f"Age: {age if age else '___'} years",
+            f"Gender: {gender or '___'}",
+            f"Phone: {phone or 'Not provided'}",
+            f"Email: {email or 'Not provided'}"
+        ]
+        rows.extend([info] for info in info_data)
+        rows.extend([[], []])
+        
+        # Test results header
+        rows.append([self._styled_cell("Test Results:", font=self.fonts['header'])])
+        
+        # Test results table headers
+        headers = ['Test Name', 'Value', 'Unit', 'Biological Reference', 'Status', 'Date', 'Lab Tech', 'Notes']
+        rows.append([self._styled_cell(header, font=self.fonts['header'], fill=self.colors['header'])
+                     for header in headers])
+        
+        # Add test results with color coding
+        for result, (normal_min, normal_max, status) in classified_results:
+            result_id, _, test_name, test_value, _, _, unit, test_date, lab_tech, notes = result
+            color = self._get_status_color(status)
+            
+            # Format normal range
+            if normal_min is not None and normal_max is not None:
+                normal_range = f"{normal_min:.2f} - {normal_max:.2f}"
+            else:
+                normal_range = "Not defined"
+            
+            # Add row data
+            row_data = [
+                test_name,
+                f"{test_value:.2f}",
+                unit or '',
+                normal_range,
+                _STATUS_DISPLAY[status],
+                test_date,
+                lab_tech or '',
+                notes or ''
+            ]
+            
+            # Apply color coding to value and status columns
+            font = self.fonts['critical'] if color in self._CRITICAL_COLORS else None
+            for col in (1, 4):  # Value and Status columns
+                row_data[col] = self._styled_cell(row_data[col], font=font, fill=color)
+            rows.append(row_data)
+        
+        # Auto-adjust column widths while streaming the rows out
+        self._write_sheet_rows(workbook, ws, rows, len(headers), max_width=30)
+    
+    @staticmethod
+    def _unique_sheet_name(name: str, used_names: set) -> str:
+        """Make a valid sheet title that is not in used_names yet, and record it
+        
+        Invalid characters become '_', the title is cut to Excel's limit, and a
+        clash gets a numeric suffix the way openpyxl renames duplicates.
+        """
+        name = _INVALID_SHEET_CHARS.sub('_', name)[:_MAX_SHEET_TITLE]
+        unique_name, suffix = name, 0
+        while unique_name in used_names:
+            suffix += 1
+            unique_name = f"{name[:_MAX_SHEET_TITLE - len(str(suffix))]}{suffix}"
+        used_names.add(unique_name)
+        return unique_name
+    
+    def _create_statistics_overview_sheet(self, workbook, total_patients, patients_with_tests, status_counts):
+        """Create statistics overview sheet from the status counts gathered for the summary"""
+        ws = workbook.create_sheet("Statistics Overview")
+        
+        total_test_results = sum(status_counts.values())
+        abnormal_results = total_test_results - status_counts['normal']
+        
+        # Title
+        rows = [[self._styled_cell("MEDICAL TEST STATISTICS OVERVIEW", font=_TITLE_FONT)], []]
+        
+        # Statistics display
+        stats_data = [
+            ("Total Patients:", total_patients),
+            ("Patients with Test Results:", patients_with_tests),
+            ("Total Test Results:", total_test_results),
+            ("Normal Results:", total_test_results - abnormal_results),
+            ("Abnormal Results:", abnormal_results),
+            ("Abnormal Percentage:", f"{(abnormal_results/total_test_results*100):.2f}%" if total_test_results > 0 else "0%")
+        ]
+        
+        rows.append([self._styled_cell("Overall Statistics:", font=self.fonts['header'])])
+        rows.extend([self._styled_cell(label, font=self.fonts['bold']), value] for label, value in stats_data)
+        
+        self._write_sheet_rows(workbook, ws, rows, 5)
+    
+    def _get_status_color(self, status: str):
+        """Get the appropriate color for a test status"""
+        return self._STATUS_COLORS.get(status, self.colors['normal'])
+    
+    def _create_patient_summary_sheet(self, workbook, patient_info, test_results):
+        """Create patient summary worksheet"""
+        ws = workbook.create_sheet("Patient Summary")
+        
+        # Calculate patient age - use position 9 for age field
+        age = patient_info[9] if len(patient_info) > 9 and patient_info[9] is not None else None
+        gender = patient_info[4] if patient_info[4] else None
+        
+        # Patient Information Section
+        title_cell = ws.cell(row=1, column=1, value="MEDICAL TEST REPORT")
+        title_cell.font = _TITLE_FONT
+        ws.merge_cells('A1:E1')
+        
+        section_cell = ws.cell(row=3, column=1, value="Patient Information")
+        section_cell.font = self.fonts['header']
+        section_cell.fill = self.colors['header']
+        
+        # Longest value per column, tracked as rows are written
+        col_lengths = []
+        self._track_column_lengths(col_lengths, (title_cell.value,))
+        self._track_column_lengths(col_lengths, (section_cell.value,))
+        
+        # Patient details with age
+        age_display = f"{age} years" if age is not None else "___"
+        gender_display = gender if gender else "___"
+        
+        # Format name properly - remove None values
+        name_parts = []
+        if patient_info[1]:  # first_name
+            name_parts.append(patient_info[1])
+        if patient_info[2]:  # last_name
+            name_parts.append(patient_info[2])
+        patient_name = " ".join(name_parts) if name_parts else "_____"
+        
+        patient_details = [
+            ("Patient ID:", patient_info[0]),
+            ("Name:", patient_name),
+            ("Date of Birth:", patient_info[3] if patient_info[3] else "Not provided"),
+            ("Age:", age_display),
+            ("Gender:", gender_display),
+            ("Phone:", patient_info[5] if patient_info[5] else "Not provided"),
+            ("Email:", patient_info[6] if patient_info[6] else "Not provided")
+        ]
+        
+        for row, (label, value) in enumerate(patient_details, 4):
+            ws.cell(row=row, column=1, value=label).font = self.fonts['bold']
+            ws.cell(row=row, column=2, value=value)
+            self._track_column_lengths(col_lengths, (label, value))
+        
+        # Latest Test Results Summary with age/gender adjustments
+        latest_results = self._get_latest_test_results(test_results)
+        
+        # Add note about age/gender adjustments
+        adjustment_note = ""
+        if age is None and gender is None:
+            adjustment_note = " (Using general adult ranges - no age/gender info)"
+        elif age is None:
+            adjustment_note = f" (Using gender-adjusted ranges for {gender} - no age info)"
+        elif gender is None:
+            adjustment_note = f" (Using age-adjusted ranges for {age} years - no gender info)"
+        else:
+            adjustment_note = f" (Age/gender adjusted for {age}-year-old {gender})"
+        
+        results_cell = ws.cell(row=13, column=1, value=f"Latest Test Results{adjustment_note}")
+        results_cell.font = self.fonts['header']
+        results_cell.fill = self.colors['header']
+        self._track_column_lengths(col_lengths, (results_cell.value,))
+        
+        # Headers for results table
+        headers = ['Test Name', 'Value', 'Unit', 'Biological Reference', 'Status', 'Range Source', 'Date']
+        self._track_column_lengths(col_lengths, headers)
+        for col, header in enumerate(headers, 1):
+            cell = ws.cell(row=14, column=col, value=header)
+            cell.font = self.fonts['header']
+            cell.fill = self.colors['header']
+        
+        # Add latest results with age/gender adjustments
+        ranges = self._adjusted_ranges((result[0] for result in latest_results), age, gender)
+        for i, result in enumerate(latest_results):
+            row = 15 + i
+            test_name, test_value, normal_min, normal_max, unit, test_date = result
+            
+            # Get age/gender adjusted ranges
+            range_info = ranges[test_name]
+            critical_low = critical_high = None
+            if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
+                normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
+                critical_low, critical_high = range_info['critical_low'], range_info['critical_high']
+            
+            status = None
+            if normal_min is not None and normal_max is not None:
+                range_text = f"{normal_min} - {normal_max}"
+                status = self.determine_test_status(test_value, normal_min, normal_max, critical_low, critical_high)
+                status_text = _STATUS_DISPLAY[status]
+                
+                # Add range source information
+                source_text = range_info.get('source', 'Base range')
+            else:
+                range_text = "Not defined"
+                status_text = "Unknown"
+                source_text = "No range available"
+            
+            # Write the whole row at once, then style only the status cell
+            row_values = (test_name, test_value, unit if unit else '', range_text, status_text, source_text, test_date)
+            ws.append(row_values)
+            self._track_column_lengths(col_lengths, row_values)
+            
+            # Apply color coding
+            if status in self.colors:
+                ws.cell(row=row, column=5).fill = self.colors[status]
+        
+        # Auto-adjust column widths from the lengths tracked while writing
+        self._set_column_widths(ws, col_lengths, 50)
+    
+    def _create_detailed_results_sheet(self, workbook, patient_info, test_results):
+        """Create detailed results worksheet"""
+        ws = workbook.create_sheet("Detailed Results")
+        
+        # Patient age/gender for the adjusted ranges
+        age = patient_info[9] if patient_info and len(patient_info) > 9 and patient_info[9] is not None else None
+        gender = patient_info[4] if patient_info and patient_info[4] else None
+        ranges = self._adjusted_ranges((result[2] for result in test_results), age, gender)
+        
+        # Collect one row of sheet values per test result
+        df_data = []
+        critical_bounds = []
+        for result in test_results:
+            result_id, patient_id, test_name, test_value, normal_min, normal_max, unit, test_date, lab_tech, notes = result
+            
+            # Get age/gender adjusted ranges
+            range_info = ranges[test_name]
+            if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
+                normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
+                critical_bounds.append((range_info['critical_low'], range_info['critical_high']))
+            else:
+                critical_bounds.append((None, None))
+            
+            df_data.append({
+                'Result ID': result_id,
+                'Test Name': test_name,
+                'Value': test_value,
+                'Unit': unit if unit else '',
+                'Normal Min': normal_min if normal_min is not None else '',
+                'Normal Max': normal_max if normal_max is not None else '',
+                'Test Date': test_date,
+                'Lab Technician': lab_tech if lab_tech else '',
+                'Notes': notes if notes else ''
+            })
+        
+        # Add headers, then one row per result straight from the collected dicts
+        col_lengths = []
+        rows = [list(df_data[0])] if df_data else []
+        rows.extend(list(data.values()) for data in df_data)
+        for r in rows:
+            ws.append(r)
+            self._track_column_lengths(col_lengths, r)
+        
+        # Format headers
+        for cell in ws[1]:
+            cell.font = self.fonts['header']
+            cell.fill = self.colors['header']
+        
+        # Apply color coding to test values with age/gender adjustments, classified in one pass
+        statuses = self.classify_test_statuses(
+            [data['Value'] for data in df_data],
+            [data['Normal Min'] for data in df_data],
+            [data['Normal Max'] for data in df_data],
+            [critical_low for critical_low, _ in critical_bounds],
+            [critical_high for _, critical_high in critical_bounds])
+        for row, (data, status) in enumerate(zip(df_data, statuses), 2):
+            if (data['Normal Min'] and data['Normal Max'] and isinstance(data['Value'], (int, float))
+                    and status in self.colors):
+                ws.cell(row=row, column=3).fill = self.colors[status]
+        
+        # Auto-adjust column widths from the lengths tracked while writing
+        self._set_column_widths(ws, col_lengths, 50)
+    
+    def _create_trends_sheet(self, workbook, test_results):
+        """Create trends analysis worksheet with charts"""
+        ws = workbook.create_sheet("Trends Analysis")
+        
+        # Group results by test type
+        test_groups = {}
+        for result in test_results:
+            test_name = result[2]
+            if test_name not in test_groups:
+                test_groups[test_name] = []
+            test_groups[test_name].append(result)
+        
+        # Create trend data for tests with multiple results
+        trend_data = []
+        for test_name, results in test_groups.items():
+            if len(results) > 1:
+                # Sort by date
+                sorted_results = sorted(results, key=lambda x: x[7])  # Sort by test_date
+                for result in sorted_results:
+                    trend_data.append({
+                        'Test Name': test_name,
+                        'Date': result[7],
+                        'Value': result[3],
+                        'Normal Min': result[4] if result[4] is not None else '',
+                        'Normal Max': result[5] if result[5] is not None else ''
+                    })
+        
+        if trend_data:
+            # Add data to worksheet
+            ws.append(list(trend_data[0]))
+            for data in trend_data:
+                ws.append(list(data.values()))
+            
+            # Format headers
+            for cell in ws[1]:
+                cell.font = self.fonts['header']
+                cell.fill = self.colors['header']
+        else:
+            notice_cell = ws.cell(row=1, column=1,
+                                  value="No trend data available (requires multiple test results of the same type)")
+            notice_cell.font = self.fonts['header']
+    
+    def _get_latest_test_results(self, test_results):
+        """Get the latest result for each test type"""
+        latest_results = {}
+        
+        # Keep the newest row per test; the output tuple is built once per test below
+        for result in test_results:
+            test_name = result[2]
+            latest = latest_results.get(test_name)
+            if latest is None or result[7] > latest[7]:
+                latest_results[test_name] = result
+        
+        return [
+            (
+                result[2],           # 0: test_name
+                result[3],           # 1: test_value
+                result[4],           # 2: normal_min
+                result[5],           # 3: normal_max
+                result[6],           # 4: unit
+                result[7]            # 5: test_date
+            )
+            for result in latest_results.values()
+        ]
+    
+    def generate_patient_summary(self, patient_id: str, output_path: str) -> bool:
+        """Generate a prescription-style patient test report (PDF)"""
+        try:
+            # Get patient and test data
+            patient_info = self.db_manager.get_patient(patient_id)
+            if not patient_info:
+                raise ValueError(f"Patient {patient_id} not found")
+            
+            # Unpack the patient columns the report uses once; age is position 9
+            first_name, last_name, gender, phone = patient_info[1], patient_info[2], patient_info[4] or None, patient_info[5]
+            age_num = patient_info[9] if len(patient_info) > 9 else None
+            
+            test_results = self.db_manager.get_patient_test_results_with_method(patient_id)
+            if not test_results:
+                raise ValueError(f"No test results found for patient {patient_id}")
+            
+            with PdfPages(output_path) as pdf:
+                # Create prescription-style report
+                fig = self._pdf_page_figure()
+                # Fixed margins instead of tight_layout/bbox_inches='tight', so savefig renders once
+                ax = fig.add_axes(_PDF_AXES_RECT)
+                ax.axis('off')
+                
+                # Current Y position for text placement
+                y_pos = 0.95
+                
+                # 1. HEADER SECTION - Clean medical report header
+                # Hospital name with larger, bold formatting
+                ax.text(0.5, y_pos, 'HITECH MEDICAL COLLEGE & HOSPITAL', 
+                       fontsize=20, fontweight='bold', ha='center', transform=ax.transAxes)
+                y_pos -= 0.04
+                
+                # Address with professional spacing
+                ax.text(0.5, y_pos, 'Hi-Tech Hospital Road, Pandra, Rasulgarh, Bhubaneswar, Odisha 751025', 
+                       fontsize=11, ha='center', transform=ax.transAxes)
+                y_pos -= 0.03
+                
+                # Simple phone number
+                ax.text(0.5, y_pos, 'Number: 0674 350 0900', 
+                       fontsize=9, ha='center', transform=ax.transAxes)
+                y_pos -= 0.06
+                
+                # 2. DEPARTMENT SECTION with better formatting
+                ax.text(0.5, y_pos, 'DEPARTMENT OF BIOCHEMISTRY', 
+                       fontsize=14, fontweight='bold', ha='center', transform=ax.transAxes)
+                y_pos -= 0.05
+                
+                # 3. PATIENT INFORMATION SECTION - Simple clean layout
+                # Create a simple box around patient info  
+                box_height = 0.15
+                box_width = 0.9
+                box_x = 0.05
+                box_y = y_pos - box_height
+                
+                # Draw simple single border
+                rect = patches.Rectangle((box_x, box_y), box_width, box_height, 
+                                        linewidth=1, edgecolor='black', facecolor='none',
+                                        transform=ax.transAxes)
+                ax.add_patch(rect)
+                
+                # Add "PATIENT INFORMATION" label at top of box
+                ax.text(0.5, y_pos - 0.02, 'PATIENT INFORMATION', fontsize=11, fontweight='bold', 
+                       ha='center', transform=ax.transAxes)
+                
+                age = age_num if age_num is not None else "___"
+                
+                # Extract timestamp information from patient records
+                processed_test_data = self._process_test_results_for_display(test_results)
+                formatted_timestamp = self._extract_and_format_date(processed_test_data)
+                
+                # Patient info inside the box with better spacing
+                info_y = y_pos - 0.05
+                
+                # Format name properly - remove None values
+                name_parts = []
+                if first_name:
+                    name_parts.append(first_name)
+                if last_name:
+                    name_parts.append(last_name)
+                patient_name_with_phone = " ".join(name_parts) if name_parts else "_____"
+                
+                if phone:
+                    patient_name_with_phone += f' (Ph: {phone})'
+                
+                # Row 1: Patient Name spanning wider, ID on right
+                ax.text(0.07, info_y, 'Patient Name:', fontsize=11, fontweight='bold', transform=ax.transAxes)
+                ax.text(0.23, info_y, f'{patient_name_with_phone}', fontsize=11, transform=ax.transAxes)
+                ax.text(0.70, info_y, 'Patient ID:', fontsize=10, fontweight='bold', transform=ax.transAxes)
+                ax.text(0.82, info_y, f'{patient_id}', fontsize=10, transform=ax.transAxes)
+                info_y -= 0.035
+                
+                # Row 2: Date on left, Ref by on right
+                ax.text(0.07, info_y, 'Received & Reported Date:', fontsize=10, fontweight='bold', transform=ax.transAxes)
+                ax.text(0.38, info_y, f'{formatted_timestamp}', fontsize=10, transform=ax.transAxes)
+                ax.text(0.70, info_y, 'Ref by:', fontsize=10, fontweight='bold', transform=ax.transAxes)
+                ax.text(0.78, info_y, 'HITECH', fontsize=10, transform=ax.transAxes)
+                info_y -= 0.035
+                
+                # Row 3: Age/Sex on left, Specimen on right  
+                ax.text(0.07, info_y, 'Age/Sex:', fontsize=10, fontweight='bold', transform=ax.transAxes)
+                ax.text(0.18, info_y, f'{age}/{gender or "___"}', fontsize=10, transform=ax.transAxes)
+                ax.text(0.70, info_y, 'Specimen:', fontsize=10, fontweight='bold', transform=ax.transAxes)
+                ax.text(0.82, info_y, 'Blood', fontsize=10, transform=ax.transAxes)
+                
+                y_pos = box_y - 0.06
+                
+                # 4. TEST RESULTS SECTION - Simple line-by-line format
+                # Add section title
+                ax.text(0.5, y_pos, 'LABORATORY TEST RESULTS', fontsize=12, fontweight='bold', 
+                       ha='center', transform=ax.transAxes)
+                y_pos -= 0.04
+                
+                # Column headers (no table borders)
+                col_positions = [0.07, 0.30, 0.55, 0.80]
+                headers = ['Parameter', 'Result Value', 'Biological Reference', 'Method']
+                
+                for i, header in enumerate(headers):
+                    ax.text(col_positions[i], y_pos, header, fontsize=11, fontweight='bold', 
+                           transform=ax.transAxes)
+                
+                y_pos -= 0.03
+                
+                # Get latest test results and display only tests the patient has taken
+                display_ready_results = self._prepare_results_for_display(processed_test_data)
+                
+                # Patient age/gender are the same for every row; resolve each test's range once
+                ranges = self._adjusted_ranges((record['test_name'] for record in display_ready_results),
+                                               age_num, gender)
+                
+                underlines = []
+                for test_record in display_ready_results:
+                    test_name = test_record['test_name']
+                    test_value = test_record['test_value'] 
+                    normal_min, normal_max = test_record['normal_range']
+                    unit = test_record['unit']
+                    test_date = test_record['timestamp']
+                    method = test_record['method']
+                    
+                    # Get age/gender adjusted ranges
+                    range_info = ranges[test_name]
+                    
+                    critical_low = critical_high = None
+                    if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
+                        normal_min, normal_max = range_info['normal_min'], range_info['normal_max']
+                        critical_low, critical_high = range_info['critical_low'], range_info['critical_high']
+                    
+                    # Determine if result is abnormal
+                    is_abnormal = False
+                    if normal_min is not None and normal_max is not None:
+                        status = self.determine_test_status(test_value, normal_min, normal_max, critical_low, critical_high)
+                        is_abnormal = status != 'normal'
+                    
+                    # Format values with units
+                    unit_text = f" {unit}" if unit else ""
+                    result_text = _format_value(test_value, unit_text)
+                    
+                    # Format normal range
+                    if normal_min is not None and normal_max is not None:
+                        normal_text = _format_range(normal_min, normal_max, unit_text)
+                    else:
+                        normal_text = "N/A"
+                    
+                    # Method text
+                    method_text = method if method else "Standard Method"
+                    
+                    # Display row data
+                    row_data = [test_name, result_text, normal_text, method_text]
+                    
+                    for i, data in enumerate(row_data):
+                        # Special formatting for abnormal result values (column 1)
+                        if i == 1 and is_abnormal:
+                            # For abnormal values: bold, italic, underlined
+                            ax.text(col_positions[i], y_pos, data, fontsize=9, fontweight='bold', 
+                                   fontstyle='italic', transform=ax.transAxes)
+                            # Underline manually; all underlines are drawn together after the table
+                            text_width = _abnormal_value_width(data)
+                            underlines.append([(col_positions[i], y_pos - 0.005),
+                                               (col_positions[i] + text_width, y_pos - 0.005)])
+                        else:
+                            ax.text(col_positions[i], y_pos, data, fontsize=9, transform=ax.transAxes)
+                    
+                    y_pos -= 0.025
+                
+                if underlines:
+                    ax.add_collection(LineCollection(underlines, colors='k', linewidths=0.5,
+                                                     transform=ax.transAxes), autolim=False)
+                
+                # 5. FOOTER SECTION
+                # Move to bottom of page for footer
+                footer_y = 0.15
+                
+                # Clinical correlation and disclaimer messages
+                ax.text(0.05, footer_y, 'Suggested Clinical correlation *if yes please discuss', 
+                       fontsize=10, transform=ax.transAxes)
+                footer_y -= 0.03
+                
+                ax.text(0.05, footer_y, 'Test items relate only to the item tested', 
+                       fontsize=10, transform=ax.transAxes)
+                footer_y -= 0.03
+                
+                ax.text(0.05, footer_y, 'No part of the report can reproduced without permission of the admin', 
+                       fontsize=10, transform=ax.transAxes)
+                footer_y -= 0.04
+                
+                # End of report marker
+                ax.text(0.5, footer_y, '**THIS IS A SYSTEM GENERATED REPORT**', 
+                       fontsize=12, fontweight='bold', ha='center', transform=ax.transAxes)
+                
+                pdf.savefig(fig)
+            
+            return True
+            
+        except Exception as e:
+            raise Exception(f"Failed to generate patient summary: {str(e)}")
+    
+    def _create_summary_chart(self, ax, test_results):
+        """Create a summary chart for the PDF report"""
+        ax.set_title('Test Results Timeline', fontweight='bold')
+        
+        # Group by test type and get recent results
+        test_groups = defaultdict(list)
+        for result in test_results:
+            test_groups[result[2]].append((result[7], result[3]))  # date, value
+        
+        # Colours stay spread over every test, but only the plotted ones are mapped
+        colors = plt.cm.Set3(np.linspace(0, 1, len(test_groups))[:5])
+        
+        for i, (test_name, results) in enumerate(islice(test_groups.items(), 5)):  # Show top 5 tests
+            if len(results) > 1:
+                # Parse the dates in one go and order by (date, value), as sorting the tuples did
+                dates = np.array([r[0] for r in results], dtype='datetime64[D]')
+                values = np.fromiter((r[1] for r in results), dtype=np.float64, count=len(results))
+                order = np.lexsort((values, dates))
+                ax.plot(dates[order], values[order], marker='o', label=test_name[:15], color=colors[i])
+        
+        ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=8)
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Test Values')
+        ax.grid(True, alpha=0.3)
+        
+        # Format x-axis dates
+        if len(test_groups) > 0:
+            ax.tick_params(axis='x', rotation=45)
+    
+    def _create_abnormal_results_summary(self, ax, latest_results, patient_info=None):
+        """Create abnormal results summary for PDF"""
+        ax.set_title('Abnormal Results Alert (Age/Gender Adjusted)', fontweight='bold')
+        ax.axis('off')
+        
+        # Get age and gender for adjustments
+        age = None
+        gender = None
+        if patient_info:
+            age = patient_info[9] if len(patient_info) > 9 and patient_info[9] is not None else None
+            gender = patient_info[4] if patient_info[4] else None
+        
+        abnormal_count = {'high': 0, 'low': 0, 'critical_high': 0, 'critical_low': 0}
+        abnormal_details = []
+        
+        # Prefer the age/gender adjusted range, then classify every result in one pass
+        ranges = self._adjusted_ranges((result[0] for result in latest_results), age, gender)
+        bounds = []
+        for test_name, test_value, normal_min, normal_max, unit, test_date in latest_results:
+            range_info = ranges[test_name]
+            if range_info['normal_min'] is not None and range_info['normal_max'] is not None:
+                bounds.append((range_info['normal_min'], range_info['normal_max'],
+                               range_info['critical_low'], range_info['critical_high']))
+            else:
+                bounds.append((normal_min, normal_max, None, None))
+        
+        statuses = []
+        if latest_results:
+            statuses = self.classify_test_statuses([result[1] for result in latest_results], *zip(*bounds))
+        
+        for result, status in zip(latest_results, statuses):
+            if status in abnormal_count:
+                test_name, test_value, unit = result[0], result[1], result[4]
+                abnormal_count[status] += 1
+                abnormal_details.append(f"{test_name}: {test_value} {unit or ''} ({_STATUS_DISPLAY[status]})")
+        
+        if any(abnormal_count.values()):
+            alert_text = "\n".join([
+                "⚠️ ABNORMAL RESULTS DETECTED ⚠️",
+                "",
+                f"Critical High: {abnormal_count['critical_high']}",
+                f"High: {abnormal_count['high']}",
+                f"Low: {abnormal_count['low']}",
+                f"Critical Low: {abnormal_count['critical_low']}",
+                "",
+                "Details (Age/Gender Adjusted):",
+                *abnormal_details[:5]
+            ])
+        else:
+            alert_text = "✅ All test results within normal ranges\n(Age/Gender Adjusted)"
+        
+        ax.text(0.1, 0.9, alert_text, transform=ax.transAxes, fontsize=9, 
+                verticalalignment='top', fontfamily='monospace')
+    
+    def generate_test_statistics_report(self, output_path: str) -> bool:
+        """Generate a system-wide statistics report"""
+        try:
+            # Get database statistics
+            stats = self.db_manager.get_database_stats()
+            
+            # Create workbook
+            wb = openpyxl.Workbook()
+            ws = wb.active
+            ws.title = "System Statistics"
+            
+            # Add title
+            ws.cell(row=1, column=1, value="Medical Test System Statistics").font = _TITLE_FONT
+            ws.merge_cells('A1:C1')
+            
+            # Add statistics
+            stats_data = [
+                ("Total Patients:", stats['patients']),
+                ("Total Test Results:", stats['test_results']),
+                ("Available Test Types:", stats['test_types']),
+                ("Report Generated:", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            ]
+            
+            for row, (label, value) in enumerate(stats_data, 3):
+                ws.cell(row=row, column=1, value=label).font = self.fonts['bold']
+                ws.cell(row=row, column=2, value=value)
+            
+            # Save workbook with password protection
+            wb.security.workbookPassword = "eipl"
+            wb.security.lockStructure = True
+            
+            # Enable autofilter and protect sheet with sorting/filtering allowed
+            if ws.max_row > 1 and ws.max_column > 1:
+                ws.auto_filter.ref = f"A1:{ws.cell(row=ws.max_row, column=ws.max_column).coordinate}"
+            
+            # Protect sheet but allow sorting and filtering
+            ws.protection.password = "eipl"
+            ws.protection.sheet = True
+            ws.protection.sort = False  # Allow sorting
+            ws.protection.autoFilter = False  # Allow filtering
+            ws.protection.formatCells = True  # Prevent format changes
+            ws.protection.selectLockedCells = False  # Allow selecting locked cells
+            ws.protection.selectUnlockedCells = False  # Allow selecting unlocked cells
+            
+            wb.save(output_path)
+            return True
+            
+        except Exception as e:
+            raise Exception(f"Failed to generate statistics report: {str(e)}")
+    
+    def _process_test_results_for_display(self, test_data):
+        """Process raw test results data into display-ready format"""
+        processed_data = []
+        for record in test_data:
+            # Extract relevant test information
+            if len(record) >= 11:  # Complete record with method
+                display_record = {
+                    'test_name': record[2],
+                    'test_value': record[3], 
+                    'normal_range': (record[4], record[5]),
+                    'unit': record[6],
+                    'timestamp': record[7],
+                    'method': record[10]
+                }
+            else:  # Legacy record format
+                display_record = {
+                    'test_name': record[2],
+                    'test_value': record[3],
+                    'normal_range': (record[4], record[5]), 
+                    'unit': record[6],
+                    'timestamp': record[7],
+                    'method': "Standard Method"
+                }
+            processed_data.append(display_record)
+        return processed_data
+    
+    def _prepare_results_for_display(self, processed_records):
+        """Prepare processed test records for final display output"""
+        # Group by test type to get only the latest result for each test
+        test_groups = {}
+        
+        for record in processed_records:
+            test_type = record['test_name']
+            record_date = record['timestamp']
+            
+            if test_type not in test_groups or record_date > test_groups[test_type]['timestamp']:
+                test_groups[test_type] = record
+                
+        return list(test_groups.values())
+    
+    def _extract_and_format_date(self, processed_records):
+        """Extract most recent timestamp and format for display"""
+        if not processed_records:
+            return "N/A"
+        
+        # Collect all valid timestamps
+        valid_timestamps = [rec['timestamp'] for rec in processed_records if rec['timestamp']]
+        
+        if not valid_timestamps:
+            return "N/A"
+            
+        # Find the latest timestamp
+        latest_timestamp = max(valid_timestamps)
+        
+        # Format for display; stored dates are strings, so most patients share a cached result
+        if isinstance(latest_timestamp, str):
+            return _display_date(latest_timestamp)
+        try:
+            return latest_timestamp.strftime("%d/%m/%Y")
+        except:
+            return str(latest_timestamp)  # Fallback to string representation
+    
+    def _get_latest_test_results_with_method(self, test_results):
+        """
+        Convert test results to include method information.
+        Expected format: (test_name, test_value, normal_min, normal_max, unit, test_date, method)
+        """
+        # Format: (test_result_id, patient_id, test_name, test_value, normal_min, normal_max, unit, test_date, lab_tech, notes, method)
+        return [_RESULT_WITH_METHOD(result) if len(result) >= 11  # New format with method
+                else _RESULT_WITHOUT_METHOD(result) + ("Standard Method",)  # Old format, default method
+                for result in test_results]